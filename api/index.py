@@ -1,5 +1,4 @@
 from flask import Flask, render_template, request, jsonify, send_file
-from werkzeug.utils import secure_filename
 import os
 import sys
 import tempfile
@@ -9,8 +8,10 @@ import logging
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.presentation_generator import PresentationGenerator
-from src.llm_service import LLMService
+from src.llm_service import get_llm_service, evict_llm_service
 from src.template_analyzer import TemplateAnalyzer
+from src.form_parser import parse_generate_form
+from src.json_provider import install_json_provider
 
 # Get the directory where this file is located
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +19,7 @@ parent_dir = os.path.dirname(current_dir)
 
 app = Flask(__name__, template_folder=os.path.join(parent_dir, 'templates'))
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+install_json_provider(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,52 +33,57 @@ def index():
 @app.route('/api/generate', methods=['POST'])
 def generate_presentation():
     """Generate a PowerPoint presentation from user input."""
-    try:
-        # Get form data
-        text_input = request.form.get('text_input', '').strip()
-        guidance = request.form.get('guidance', '').strip()
-        llm_provider = request.form.get('llm_provider')
-        api_key = request.form.get('api_key', '').strip()
-
-        # Validation
-        if not text_input:
-            return jsonify({'error': 'Text input is required'}), 400
-        
-        if len(text_input) > 10000:
-            return jsonify({'error': 'Text input exceeds 10,000 character limit'}), 400
-            
-        if not llm_provider:
-            return jsonify({'error': 'LLM provider selection is required'}), 400
-            
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
-
-        # Handle file upload
-        if 'template_file' not in request.files:
-            return jsonify({'error': 'Template file is required'}), 400
-            
-        template_file = request.files['template_file']
-        if template_file.filename == '':
-            return jsonify({'error': 'No template file selected'}), 400
-            
-        if not template_file.filename.lower().endswith(('.pptx', '.potx')):
-            return jsonify({'error': 'Template must be a .pptx or .potx file'}), 400
+    # Reject oversized uploads from Content-Length before reading the body
+    if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        return jsonify({'error': 'Upload exceeds the 50MB limit'}), 413
 
+    try:
         # Use temporary directory for Vercel
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded template
-            template_filename = secure_filename(template_file.filename)
-            template_path = os.path.join(temp_dir, template_filename)
-            template_file.save(template_path)
+            # Stream form fields and the uploaded template straight to disk
+            form = parse_generate_form(request, temp_dir, accept_images=False)
+            text_input = form.get('text_input').strip()
+            guidance = form.get('guidance').strip()
+            llm_provider = form.get('llm_provider')
+            api_key = form.get('api_key').strip()
+
+            # Validation (parsing stops at an invalid template, so check it first)
+            if form.template_invalid:
+                return jsonify({'error': 'Template must be a valid .pptx or .potx file'}), 400
+
+            if not text_input:
+                return jsonify({'error': 'Text input is required'}), 400
+            
+            if len(text_input) > 10000:
+                return jsonify({'error': 'Text input exceeds 10,000 character limit'}), 400
+                
+            if not llm_provider:
+                return jsonify({'error': 'LLM provider selection is required'}), 400
+                
+            if not api_key:
+                return jsonify({'error': 'API key is required'}), 400
+
+            if not form.template_filename:
+                return jsonify({'error': 'Template file is required'}), 400
+                
+            if not form.template_path:
+                return jsonify({'error': 'Template must be a .pptx or .potx file'}), 400
+
+            template_path = form.template_path
 
             # Initialize services
-            llm_service = LLMService(llm_provider, api_key)
+            llm_service = get_llm_service(llm_provider, api_key)
             template_analyzer = TemplateAnalyzer(template_path)
             presentation_generator = PresentationGenerator(template_analyzer, llm_service)
 
             # Generate presentation structure
-            logger.info(f"Generating presentation structure using {llm_provider}")
-            presentation_data = llm_service.analyze_text_structure(text_input, guidance)
+            logger.info("Generating presentation structure using %s", llm_provider)
+            try:
+                presentation_data = llm_service.analyze_text_structure(text_input, guidance)
+            except Exception:
+                # Rebuild the client next time in case it is in a bad state
+                evict_llm_service(llm_provider, api_key)
+                raise
             
             if not presentation_data or 'slides' not in presentation_data:
                 return jsonify({'error': 'Failed to generate presentation structure'}), 500
@@ -95,7 +102,7 @@ def generate_presentation():
             )
 
     except Exception as e:
-        logger.error(f"Error generating presentation: {str(e)}")
+        logger.exception("Error generating presentation: %s", e)
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
 @app.route('/api/health')
@@ -1,23 +1,53 @@
-from flask import Flask, render_template, request, jsonify, send_file
+import sys
+
+# Patch blocking sockets before anything else imports them so LLM calls and
+# uploads yield to other requests when served by gevent
+USE_GEVENT = '--use-gevent' in sys.argv
+if USE_GEVENT:
+    from gevent import monkey
+    monkey.patch_all()
+
+from flask import Flask, render_template, request, jsonify, send_file, make_response
 from werkzeug.utils import secure_filename
 import os
+import shutil
 import tempfile
+import threading
+import time
+import uuid
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from src.presentation_generator import PresentationGenerator
-from src.llm_service import LLMService
+from src.llm_service import get_llm_service, evict_llm_service
 from src.template_analyzer import TemplateAnalyzer
+from src.form_parser import parse_generate_form
+from src.json_provider import install_json_provider
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
-app.config['UPLOAD_FOLDER'] = 'temp_uploads'
+install_json_provider(app)
+
+# Each request gets its own temporary directory under UPLOAD_FOLDER, removed
+# when the request ends. Uploads only live that long, so use RAM-backed
+# /dev/shm when available instead of the working directory (often a slow
+# mounted volume). Set UPLOAD_FOLDER to override, e.g. where /dev/shm is too small.
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER') or SCRATCH_DIR
+
+# Behind nginx, set ACCEL_REDIRECT_PREFIX (e.g. /internal/) to an internal
+# location aliased to the temp directory so nginx sends generated files itself:
+#   location /internal/ { internal; alias /tmp/; }
+# USE_X_SENDFILE=1 does the same for Apache/lighttpd via X-Sendfile.
+app.config['ACCEL_REDIRECT_PREFIX'] = os.environ.get('ACCEL_REDIRECT_PREFIX', '')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Ensure upload folder exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
 @app.route('/')
 def home():
     """Serve the home/landing page."""
@@ -31,86 +61,226 @@ def generator():
 @app.route('/api/generate', methods=['POST'])
 def generate_presentation():
     """Generate a PowerPoint presentation from user input."""
+    if _body_too_large():
+        return jsonify({'error': 'Upload exceeds the 50MB limit'}), 413
+    
     try:
-        # Get form data
-        text_input = request.form.get('text_input', '').strip()
-        guidance = request.form.get('guidance', '').strip()
-        llm_provider = request.form.get('llm_provider', 'openai')
-        api_key = request.form.get('api_key', '').strip()
-        
-        # Get uploaded template file
-        template_file = request.files.get('template_file')
-        
-        # Get uploaded image files
-        image_files = request.files.getlist('image_files')
-        
-        # Validate inputs
-        if not text_input:
-            return jsonify({'error': 'Text input is required'}), 400
-        
-        if not api_key:
-            return jsonify({'error': 'API key is required'}), 400
+        with tempfile.TemporaryDirectory(dir=app.config['UPLOAD_FOLDER']) as temp_dir:
+            # Stream form fields and uploads straight to disk
+            form = parse_generate_form(request, temp_dir)
+            
+            text_input = form.get('text_input').strip()
+            guidance = form.get('guidance').strip()
+            llm_provider = form.get('llm_provider') or 'openai'
+            api_key = form.get('api_key').strip()
+            
+            # Validate inputs
+            error = _validate_form(form)
+            if error:
+                return jsonify({'error': error}), 400
+            
+            template_filename = secure_filename(form.template_filename)
             
-        if not template_file or template_file.filename == '':
-            return jsonify({'error': 'Template file is required'}), 400
-        
-        # Validate file type
-        allowed_extensions = {'.pptx', '.potx'}
-        file_ext = os.path.splitext(template_file.filename)[1].lower()
-        if file_ext not in allowed_extensions:
-            return jsonify({'error': 'Only .pptx and .potx files are allowed'}), 400
-        
-        # Save uploaded template temporarily
-        template_filename = secure_filename(template_file.filename)
-        template_path = os.path.join(app.config['UPLOAD_FOLDER'], template_filename)
-        template_file.save(template_path)
-        
-        # Save uploaded images temporarily
-        image_paths = []
-        for image_file in image_files:
-            if image_file and image_file.filename:
-                # Validate image file type
-                allowed_image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-                img_ext = os.path.splitext(image_file.filename)[1].lower()
-                if img_ext in allowed_image_extensions:
-                    image_filename = secure_filename(image_file.filename)
-                    image_path = os.path.join(app.config['UPLOAD_FOLDER'], f"img_{image_filename}")
-                    image_file.save(image_path)
-                    image_paths.append(image_path)
-        
-        try:
             # Initialize services
-            llm_service = LLMService(llm_provider, api_key)
-            template_analyzer = TemplateAnalyzer(template_path)
+            llm_service = get_llm_service(llm_provider, api_key)
+            template_analyzer = TemplateAnalyzer(form.template_path)
             presentation_generator = PresentationGenerator(llm_service, template_analyzer)
             
             # Generate presentation with images
-            output_path = presentation_generator.generate(text_input, guidance, image_paths)
+            try:
+                output_path = presentation_generator.generate(text_input, guidance, form.image_paths)
+            except Exception:
+                # Rebuild the client next time in case it is in a bad state
+                evict_llm_service(llm_provider, api_key)
+                raise
             
             # Return the generated file
-            return send_file(
-                output_path,
-                as_attachment=True,
-                download_name=f"generated_presentation_{template_filename}",
-                mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-            )
-        
-        finally:
-            # Clean up uploaded files
-            if os.path.exists(template_path):
-                os.remove(template_path)
-            for image_path in image_paths:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
+            return _send_presentation(output_path, f"generated_presentation_{template_filename}")
     
     except Exception as e:
-        logger.error(f"Error generating presentation: {str(e)}")
+        logger.exception("Error generating presentation: %s", e)
         return jsonify({'error': f'Failed to generate presentation: {str(e)}'}), 500
 
+def _body_too_large():
+    """Reject oversized uploads from Content-Length before reading the body."""
+    return bool(request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH'])
+
+def _validate_form(form):
+    """Return an error message for an incomplete generation form, or None."""
+    # Checked first: parsing stops at an invalid template, so later fields may be missing
+    if form.template_invalid:
+        return 'Template file is not a valid .pptx or .potx file'
+    
+    if not form.get('text_input').strip():
+        return 'Text input is required'
+    
+    if not form.get('api_key').strip():
+        return 'API key is required'
+    
+    if not form.template_filename:
+        return 'Template file is required'
+    
+    # Template parts with other extensions are not saved
+    if not form.template_path:
+        return 'Only .pptx and .potx files are allowed'
+    
+    return None
+
+def _send_presentation(output_path, download_name):
+    """Send a generated file, handing the transfer to the front-end server when configured."""
+    accel_prefix = app.config['ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + os.path.basename(output_path)
+        response.headers['Content-Type'] = PPTX_MIMETYPE
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        return response
+    
+    return send_file(
+        output_path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=PPTX_MIMETYPE,
+        conditional=True
+    )
+
+# Background generation jobs: POST /api/job returns a job id right away and the
+# pipeline runs in a worker process; clients poll GET /api/job/<job_id>.
+# Jobs live in this process's memory, so serve the app from a single web worker
+# (gunicorn -w 1, as in the Procfile): another worker would answer polls with 404.
+JOB_TTL_SECONDS = 3600
+_executor = None
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def _get_executor():
+    """Create the worker pool on first use."""
+    global _executor
+    if _executor is None:
+        # Spawn rather than fork: a forked child of a gevent-patched worker inherits
+        # its hub and server state, and under gunicorn -k gevent the pool hangs
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                        mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+def _run_generation_job(llm_provider, api_key, text_input, guidance, template_path, image_paths):
+    """Run the full generation pipeline in a worker process and return the output path."""
+    llm_service = get_llm_service(llm_provider, api_key)
+    template_analyzer = TemplateAnalyzer(template_path)
+    presentation_generator = PresentationGenerator(llm_service, template_analyzer)
+    try:
+        return presentation_generator.generate(text_input, guidance, image_paths)
+    except Exception:
+        evict_llm_service(llm_provider, api_key)
+        raise
+
+def _discard_job(job):
+    """Remove a job's uploads and, once finished, its output file."""
+    shutil.rmtree(job['dir'], ignore_errors=True)
+    future = job['future']
+    if future.done() and not future.cancelled() and future.exception() is None:
+        output_path = future.result()
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+def _prune_jobs():
+    """Drop finished jobs that were never downloaded."""
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _jobs_lock:
+        expired = [job_id for job_id, job in _jobs.items()
+                   if job['created'] < cutoff and job['future'].done()]
+        stale = [_jobs.pop(job_id) for job_id in expired]
+    for job in stale:
+        _discard_job(job)
+
+@app.route('/api/job', methods=['POST'])
+def submit_job():
+    """Start generating a presentation in the background and return its job id."""
+    if _body_too_large():
+        return jsonify({'error': 'Upload exceeds the 50MB limit'}), 413
+    
+    _prune_jobs()
+    job_dir = tempfile.mkdtemp(dir=app.config['UPLOAD_FOLDER'])
+    try:
+        form = parse_generate_form(request, job_dir)
+        
+        error = _validate_form(form)
+        if error:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return jsonify({'error': error}), 400
+        
+        future = _get_executor().submit(
+            _run_generation_job,
+            form.get('llm_provider') or 'openai',
+            form.get('api_key').strip(),
+            form.get('text_input').strip(),
+            form.get('guidance').strip(),
+            form.template_path,
+            form.image_paths
+        )
+    except Exception as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        logger.exception("Error starting generation job: %s", e)
+        return jsonify({'error': f'Failed to start generation: {str(e)}'}), 500
+    
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            'future': future,
+            'dir': job_dir,
+            'download_name': f"generated_presentation_{secure_filename(form.template_filename)}",
+            'created': time.time()
+        }
+    return jsonify({'job_id': job_id, 'status_url': f'/api/job/{job_id}'}), 202
+
+@app.route('/api/job/<job_id>')
+def job_status(job_id):
+    """Report whether a background job is still running, finished or failed."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    future = job['future']
+    if not future.done():
+        return jsonify({'status': 'running'})
+    
+    error = future.exception()
+    if error is not None:
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+        _discard_job(job)
+        return jsonify({'status': 'error', 'error': f'Failed to generate presentation: {str(error)}'})
+    
+    return jsonify({'status': 'done', 'url': f'/api/job/{job_id}/download'})
+
+@app.route('/api/job/<job_id>/download')
+def job_download(job_id):
+    """Send a finished job's presentation and discard the job."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None or not job['future'].done() or job['future'].exception() is not None:
+            return jsonify({'error': 'Presentation is not ready'}), 404
+        _jobs.pop(job_id)
+    
+    response = _send_presentation(job['future'].result(), job['download_name'])
+    if app.config['ACCEL_REDIRECT_PREFIX'] or app.config['USE_X_SENDFILE']:
+        # The front-end server reads the output after we return; only drop the uploads
+        shutil.rmtree(job['dir'], ignore_errors=True)
+    else:
+        # send_file has already opened the output, so unlinking it is safe on POSIX
+        _discard_job(job)
+    return response
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint."""
     return jsonify({'status': 'healthy'})
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if USE_GEVENT:
+        from gevent.pywsgi import WSGIServer
+        logger.info("Serving with gevent WSGIServer on port 5000")
+        WSGIServer(('0.0.0.0', 5000), app).serve_forever()
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
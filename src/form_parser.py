@@ -0,0 +1,200 @@
+"""
+Form parser module for streaming multipart uploads straight to disk.
+"""
+import os
+import shutil
+import logging
+from typing import Dict, List, Optional
+from werkzeug.utils import secure_filename
+
+# Import the streaming parser with try/except to fall back to Werkzeug gracefully
+try:
+    from streaming_form_data import StreamingFormDataParser
+    from streaming_form_data.targets import BaseTarget, ValueTarget
+    STREAMING_FORM_DATA_AVAILABLE = True
+except ImportError:
+    StreamingFormDataParser = None
+    BaseTarget = object
+    ValueTarget = None
+    STREAMING_FORM_DATA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TEXT_FIELDS = ('text_input', 'guidance', 'llm_provider', 'api_key')
+TEMPLATE_EXTENSIONS = {'.pptx', '.potx'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
+READ_CHUNK_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 1 << 20
+# .pptx/.potx files are ZIP packages, which start with a local file header
+ZIP_MAGIC = b'PK\x03\x04'
+
+class ParsedForm:
+    """Text fields and saved files from a presentation generation request."""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.template_filename: Optional[str] = None
+        self.template_path: Optional[str] = None
+        self.template_invalid = False
+        self.image_paths: List[str] = []
+
+    def get(self, name: str, default: str = '') -> str:
+        """Get a text field value."""
+        return self.fields.get(name, default)
+
+class _UploadTarget(BaseTarget):
+    """Streams each file part of a form field into its own file on disk."""
+
+    def __init__(self, upload_dir: str, prefix: str, allowed_extensions: set, magic: bytes = b''):
+        super().__init__()
+        self.upload_dir = upload_dir
+        self.prefix = prefix
+        self.allowed_extensions = allowed_extensions
+        self.magic = magic
+        self.filenames: List[str] = []
+        self.paths: List[str] = []
+        self.rejected = False
+        self._file = None
+        self._head = b''
+
+    def on_start(self):
+        filename = self.multipart_filename or ''
+        self._file = None
+        if not filename:
+            return
+
+        self.filenames.append(filename)
+        if os.path.splitext(filename)[1].lower() not in self.allowed_extensions:
+            return
+
+        path = os.path.join(self.upload_dir, self.prefix + secure_filename(filename))
+        self._file = open(path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        self.paths.append(path)
+        self._head = b''
+
+    def on_data_received(self, chunk: bytes):
+        if self._file is None:
+            return
+
+        # Check the leading bytes before writing anything else
+        if len(self._head) < len(self.magic):
+            self._head += chunk[:len(self.magic) - len(self._head)]
+            if not self.magic.startswith(self._head):
+                self._reject()
+                return
+        self._file.write(chunk)
+
+    def on_finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if len(self._head) < len(self.magic):
+                self._reject()
+
+    def _reject(self):
+        """Discard the current part because its content does not match the magic bytes."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        path = self.paths.pop()
+        if os.path.exists(path):
+            os.remove(path)
+        self.rejected = True
+
+def parse_generate_form(req, upload_dir: str, accept_images: bool = True) -> ParsedForm:
+    """
+    Parse a generation request, writing uploaded files directly into upload_dir.
+
+    Args:
+        req: The Flask request
+        upload_dir: Directory to save the template and images in
+        accept_images: Whether to save files sent as image_files
+
+    Returns:
+        ParsedForm with the text fields and the paths of the saved files
+    """
+    content_type = req.headers.get('Content-Type', '')
+    if STREAMING_FORM_DATA_AVAILABLE and content_type.startswith('multipart/form-data'):
+        return _parse_streaming(req, upload_dir, accept_images)
+    return _parse_with_werkzeug(req, upload_dir, accept_images)
+
+def _parse_streaming(req, upload_dir: str, accept_images: bool) -> ParsedForm:
+    """Parse the request body incrementally with streaming-form-data."""
+    parser = StreamingFormDataParser(headers={'Content-Type': req.headers.get('Content-Type', '')})
+
+    values = {name: ValueTarget() for name in TEXT_FIELDS}
+    for name, target in values.items():
+        parser.register(name, target)
+
+    template_target = _UploadTarget(upload_dir, '', TEMPLATE_EXTENSIONS, ZIP_MAGIC)
+    parser.register('template_file', template_target)
+    image_target = None
+    if accept_images:
+        image_target = _UploadTarget(upload_dir, 'img_', IMAGE_EXTENSIONS)
+        parser.register('image_files', image_target)
+
+    try:
+        while True:
+            chunk = req.stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+            # A template that is not a ZIP fails anyway; stop reading the body
+            if template_target.rejected:
+                break
+    except Exception:
+        for path in template_target.paths + (image_target.paths if image_target else []):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    form = ParsedForm()
+    for name, target in values.items():
+        form.fields[name] = target.value.decode('utf-8', errors='replace')
+    form.template_invalid = template_target.rejected
+    if template_target.filenames:
+        form.template_filename = template_target.filenames[0]
+    if template_target.paths:
+        form.template_path = template_target.paths[0]
+    if image_target:
+        form.image_paths = image_target.paths
+    return form
+
+def _parse_with_werkzeug(req, upload_dir: str, accept_images: bool) -> ParsedForm:
+    """Parse the request with Werkzeug's form parser."""
+    form = ParsedForm()
+    for name in TEXT_FIELDS:
+        form.fields[name] = req.form.get(name, '')
+
+    template_file = req.files.get('template_file')
+    if template_file and template_file.filename:
+        form.template_filename = template_file.filename
+        if os.path.splitext(template_file.filename)[1].lower() in TEMPLATE_EXTENSIONS:
+            if _has_magic(template_file, ZIP_MAGIC):
+                template_path = os.path.join(upload_dir, secure_filename(template_file.filename))
+                _save_upload(template_file, template_path)
+                form.template_path = template_path
+            else:
+                form.template_invalid = True
+
+    if accept_images:
+        for image_file in req.files.getlist('image_files'):
+            if image_file and image_file.filename:
+                img_ext = os.path.splitext(image_file.filename)[1].lower()
+                if img_ext in IMAGE_EXTENSIONS:
+                    image_path = os.path.join(upload_dir, f"img_{secure_filename(image_file.filename)}")
+                    _save_upload(image_file, image_path)
+                    form.image_paths.append(image_path)
+
+    return form
+
+def _has_magic(file_storage, magic: bytes) -> bool:
+    """Check an upload's leading bytes without consuming the stream."""
+    head = file_storage.stream.read(len(magic))
+    file_storage.stream.seek(0)
+    return head == magic
+
+def _save_upload(file_storage, path: str):
+    """Copy an uploaded file to disk with a large buffer to keep syscalls few."""
+    with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        shutil.copyfileobj(file_storage.stream, f, length=WRITE_BUFFER_SIZE)
@@ -0,0 +1,26 @@
+"""
+Flask JSON provider backed by orjson.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; install_json_provider leaves Flask's default in place without it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize and parse request/response JSON with orjson."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def install_json_provider(app):
+    """Use orjson for jsonify and request.get_json when it is installed."""
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,187 @@
+"""
+Response caches for LLM calls: an exact-match LRU (optionally backed by disk)
+and a semantic cache for near-duplicate prompts.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+# diskcache is optional; without it the exact cache is memory-only
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    diskcache = None
+    DISKCACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Exact-match LRU cache of LLM responses keyed by a request hash.
+    
+    Entries live in memory; when a directory is given and ``diskcache`` is
+    installed they are also written to disk, so they are shared between worker
+    processes and survive restarts.
+    """
+    
+    def __init__(self, maxsize: int = 512, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if directory:
+            if DISKCACHE_AVAILABLE:
+                self._disk = diskcache.Cache(directory)
+            else:
+                logger.warning("diskcache is not installed; LLM response cache stays in memory")
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                return response
+        
+        if self._disk is not None:
+            response = self._disk.get(key)
+            if response is not None:
+                self._remember(key, response)
+            return response
+        return None
+    
+    def put(self, key: str, response: str):
+        """Store a response under key."""
+        self._remember(key, response)
+        if self._disk is not None:
+            self._disk.set(key, response)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remember(self, key: str, response: str):
+        """Insert into the in-memory LRU, evicting the oldest entry when full."""
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+class SemanticCache:
+    """Cache that serves responses for prompts that are near-duplicates of earlier ones.
+    
+    Prompts are embedded with a small local sentence-transformers model and a
+    cached response is returned when the cosine similarity exceeds the threshold.
+    Requires the optional ``sentence-transformers`` and ``numpy`` packages.
+    """
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', threshold: float = 0.92,
+                 ttl: float = 3600, path: Optional[str] = None):
+        try:
+            import numpy as np
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("sentence-transformers and numpy are required for the semantic cache") from e
+        
+        self._np = np
+        self._model = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.path = path
+        self._embeddings = []
+        self._responses = []
+        self._scopes = []
+        self._timestamps = []
+        self._matrix = None
+        self._lock = threading.Lock()
+        
+        if path and os.path.exists(path):
+            self._load()
+    
+    def get(self, scope: str, prompt: str) -> Optional[str]:
+        """Return the cached response for the most similar prompt within scope, if close enough."""
+        with self._lock:
+            if not self._embeddings:
+                return None
+        
+        query = self._model.encode(prompt, normalize_embeddings=True)
+        
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = self._np.vstack(self._embeddings)
+            # Embeddings are normalized on insert, so the dot product is the cosine similarity
+            sims = self._matrix @ query
+            cutoff = time.time() - self.ttl
+            for i, (entry_scope, timestamp) in enumerate(zip(self._scopes, self._timestamps)):
+                if entry_scope != scope or timestamp < cutoff:
+                    sims[i] = -1.0
+            best = int(sims.argmax())
+            if sims[best] > self.threshold:
+                return self._responses[best]
+        return None
+    
+    def put(self, scope: str, prompt: str, response: str):
+        """Store a response for the given prompt."""
+        self.warm(scope, [prompt], [response])
+    
+    def warm(self, scope: str, prompts: List[str], responses: List[str], batch_size: int = 32):
+        """Bulk-load prompt/response pairs, encoding the prompts in batches."""
+        if not prompts:
+            return
+        embeddings = self._model.encode(prompts, batch_size=batch_size, normalize_embeddings=True)
+        now = time.time()
+        
+        with self._lock:
+            self._prune(now)
+            for embedding, response in zip(embeddings, responses):
+                self._embeddings.append(embedding)
+                self._responses.append(response)
+                self._scopes.append(scope)
+                self._timestamps.append(now)
+            self._matrix = None
+            if self.path:
+                self._save()
+    
+    def _prune(self, now: float):
+        """Drop expired entries."""
+        cutoff = now - self.ttl
+        keep = [i for i, timestamp in enumerate(self._timestamps) if timestamp >= cutoff]
+        if len(keep) == len(self._timestamps):
+            return
+        self._embeddings = [self._embeddings[i] for i in keep]
+        self._responses = [self._responses[i] for i in keep]
+        self._scopes = [self._scopes[i] for i in keep]
+        self._timestamps = [self._timestamps[i] for i in keep]
+        self._matrix = None
+    
+    def _load(self):
+        """Restore cached entries persisted by a previous process."""
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            self._embeddings = data['embeddings']
+            self._responses = data['responses']
+            self._scopes = data['scopes']
+            self._timestamps = data['timestamps']
+            self._prune(time.time())
+        except Exception as e:
+            logger.warning("Could not load semantic cache from %s: %s", self.path, e)
+    
+    def _save(self):
+        """Persist cached entries so they survive process restarts."""
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'embeddings': self._embeddings,
+                    'responses': self._responses,
+                    'scopes': self._scopes,
+                    'timestamps': self._timestamps
+                }, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning("Could not save semantic cache to %s: %s", self.path, e)
@@ -2,84 +2,587 @@
 LLM Service module for handling different LLM providers.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import hashlib
+import importlib.util
+import itertools
 import logging
-from typing import Dict, List, Any
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, List, Any, Literal, Optional, Tuple, Union
+from .llm_cache import ResponseCache, SemanticCache
 
-# Import LLM libraries with try/except to handle missing packages gracefully
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OpenAI = None
-    OPENAI_AVAILABLE = False
+# LLM SDKs are imported in _setup_client, only for the provider in use, so
+# workers don't pay for loading every SDK (gRPC/protobuf for Gemini) at startup.
+# The HTTP client is deferred the same way: httpx loads in _get_http_client.
 
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    anthropic = None
-    ANTHROPIC_AVAILABLE = False
+    orjson = None
+    ORJSON_AVAILABLE = False
 
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except (ImportError, Exception):
-    genai = None
-    GEMINI_AVAILABLE = False
+# h2 is only needed so httpx can negotiate HTTP/2
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
 
 logger = logging.getLogger(__name__)
 
+# Model used for each provider (also part of the response cache key)
+PROVIDER_MODELS = {
+    'openai': 'gpt-3.5-turbo',
+    'anthropic': 'claude-3-sonnet-20240229',
+    'gemini': 'gemini-pro',
+    'aipipe': 'gpt-3.5-turbo',
+}
+
+# Responses are only cached for (near-)deterministic sampling; higher
+# temperatures are expected to vary between calls.
+RESPONSE_CACHE_SIZE = 512
+CACHEABLE_MAX_TEMPERATURE = 0.1
+# LLM_CACHE=0 disables response caching; LLM_CACHE_DIR adds a shared on-disk tier
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE', '1') != '0'
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR')
+
+# Notes used when generation fails; never cached, so the slide is retried next time
+FALLBACK_SPEAKER_NOTES = "Key points to discuss based on slide content."
+
+# Inputs shorter than this (after cleaning, with no guidance) skip the LLM: the
+# prompt would dwarf the content and the model can only paraphrase it
+DIRECT_FALLBACK_MAX_CHARS = 200
+
+# Services (and their SDK clients) are reused across requests for the same key
+SERVICE_CACHE_SIZE = 64
+
+# Connection pool shared by the OpenAI and Anthropic SDK clients
+HTTP_MAX_CONNECTIONS = 32
+HTTP_TIMEOUT = 60.0
+
+# Per-key request budget (requests per minute); 0 leaves throttling to the provider's 429s
+LLM_RPM_PER_KEY = int(os.getenv('LLM_RPM_PER_KEY', '0'))
+
+# Slides per batched speaker-notes call; larger decks are split and sent concurrently
+NOTES_BATCH_SIZE = 20
+
+# Fallback slide text; per-category titles and notes are built once at import
+_SECTION_HEADERS = ("Market Overview", "Key Features", "Implementation", "Benefits", "Results")
+_CONTENT_CATEGORIES = ("Market Analysis", "Product Features", "Technical Specs", "Business Impact", "Success Metrics")
+_SECTION_NOTES = tuple(f"Transition to {header} section with detailed analysis." for header in _SECTION_HEADERS)
+_DEEP_DIVE_TITLES = tuple(f"{category} Deep Dive" for category in _CONTENT_CATEGORIES)
+_DEEP_DIVE_NOTES = tuple(
+    f"Detailed analysis of {category.lower()} with supporting data and strategic implications."
+    for category in _CONTENT_CATEGORIES
+)
+_KEY_INSIGHT = "Key insight #%d"
+
+# Filler points used to pad sparse fallback slides
+_ENHANCEMENT_POINTS = (
+    "Strategic Importance: Critical for business success",
+    "Implementation Timeline: Phased approach over 6 months",
+    "Success Metrics: Measurable KPIs and benchmarks",
+    "Risk Mitigation: Comprehensive contingency planning",
+    "Stakeholder Impact: Benefits across all departments"
+)
+
+# The structure instructions never change, so they go first as a system prompt
+# where provider prompt caching can reuse them; the source text follows as the
+# user message
+_STRUCTURE_SYSTEM_PROMPT = """
+=== EXECUTIVE PRESENTATION CONSULTANT BRIEF ===
+
+You are an elite presentation strategist tasked with transforming raw content into a compelling, professional PowerPoint presentation. Your mission: Create presentation-ready content that maximizes impact while maintaining 100% fidelity to the source material, which the user provides along with the presentation context.
+
+=== EXCELLENCE STANDARDS ===
+
+-- CONTENT INTEGRITY --
+- Every slide MUST derive directly from the provided content
+- Preserve all specific metrics, dates, percentages, and technical details
+- Expand and enhance source material, never add external information
+- Transform complex paragraphs into clear, actionable insights
+
+-- PROFESSIONAL IMPACT --
+- Use executive-level language with strong value propositions
+- Create compelling narratives that drive decision-making
+- Structure content for visual consumption, not reading
+- Include strategic insights and business implications
+
+-- VISUAL OPTIMIZATION --
+- Maximum 5 bullet points per slide
+- Each bullet: 8-15 words with specific, measurable details
+- Use active voice and power words
+- Structure for maximum visual hierarchy and flow
+
+-- ADVANCED FORMATTING --
+- Zero encoding artifacts (_x000D_, _x000A_, etc.)
+- No repetitive labels ("Analysis:", "Overview:")
+- Varied, descriptive prefixes that add context
+- Professional slide titles with clear value propositions
+
+=== REQUIRED OUTPUT STRUCTURE ===
+
+{
+    "title": "Compelling Main Title (specific to content, not generic)",
+    "slides": [
+        {
+            "title": "Strategic Value-Driven Title",
+            "content": [
+                "Market Intelligence: $X.XB market growing XX% annually with specific trend analysis",
+                "Competitive Advantage: Unique differentiator delivering measurable business value",
+                "Implementation Strategy: Specific action with timeline and resource requirements",
+                "ROI Projection: Quantified benefits with timeframe and success metrics",
+                "Risk Mitigation: Specific challenge addressed with proven solution approach"
+            ],
+            "slide_type": "title|overview|strategy|analysis|implementation|conclusion",
+            "emphasis_points": ["Key metric or statistic", "Critical success factor"],
+            "speaking_notes": "Executive talking points with context and supporting details"
+        }
+    ]
+}
+
+=== CONTENT TRANSFORMATION EXAMPLES ===
+
+BEFORE (Raw): "The fitness app market is valued at $4.4 billion, growing 14.7% annually"
+AFTER (Professional): "Market Opportunity: $4.4B fitness technology sector expanding 14.7% YoY"
+
+BEFORE (Raw): "87% of people struggle with consistent workouts"
+AFTER (Professional): "User Pain Point: 87% abandonment rate creates $3.8B addressable market gap"
+
+BEFORE (Raw): "AI Personal Trainer with real-time form analysis"
+AFTER (Professional): "Innovation Core: AI-powered form correction increases workout effectiveness 40%"
+
+=== SLIDE ARCHITECTURE ===
+1. HOOK SLIDE: Compelling problem/opportunity with quantified impact
+2. CONTEXT SLIDES: Market landscape, user needs, competitive positioning
+3. SOLUTION SLIDES: Core value proposition with differentiated features
+4. VALIDATION SLIDES: Evidence, metrics, proof points, testimonials
+5. EXECUTION SLIDES: Implementation roadmap, resource requirements, timeline
+6. IMPACT SLIDES: ROI projections, success metrics, scaling potential
+7. ACTION SLIDE: Clear next steps with ownership and deadlines
+
+=== CONTENT ENHANCEMENT RULES ===
+- Transform features into benefits with business impact
+- Convert data points into strategic insights
+- Upgrade technical details into competitive advantages
+- Elevate implementation details into strategic roadmaps
+- Enhance outcomes into measurable value propositions
+
+=== FINAL VALIDATION ===
+- Can a C-suite executive quickly grasp the value proposition?
+- Does each slide advance the narrative toward a decision?
+- Are all claims supported by specific evidence from source content?
+- Would this presentation drive action and investment?
+
+Generate 6-10 slides that tell a compelling story while honoring every detail of the source material.
+"""
+
+# Schema and core rules only, for cheap or bulk runs where the full brief's examples cost too many tokens
+_STRUCTURE_SYSTEM_PROMPT_COMPACT = """
+You turn source content into a professional PowerPoint presentation. Use only facts from the source, keeping every metric, date and percentage.
+
+Rules:
+- 6-10 slides that tell one story, from opportunity to next steps
+- At most 5 bullets per slide, 8-15 words each, with a descriptive prefix ("Market Opportunity: ...")
+- Specific, value-driven slide titles
+- No encoding artifacts and no repeated labels
+
+Return only JSON:
+{"title": "...", "slides": [{"title": "...", "content": ["..."], "slide_type": "title|overview|strategy|analysis|implementation|conclusion", "emphasis_points": ["..."], "speaking_notes": "..."}]}
+"""
+
+_STRUCTURE_SYSTEM_PROMPTS = {
+    'full': _STRUCTURE_SYSTEM_PROMPT,
+    'compact': _STRUCTURE_SYSTEM_PROMPT_COMPACT
+}
+
+_STRUCTURE_USER_PROMPT = """SOURCE CONTENT:
+{text}
+
+PRESENTATION CONTEXT: {guidance}"""
+
+@lru_cache(maxsize=128)
+def _build_structure_prompt(cleaned_text: str, guidance: str) -> str:
+    """Assemble the user part of the structure prompt; cached because the same text is often retried."""
+    return _STRUCTURE_USER_PROMPT.format(
+        text=cleaned_text,
+        guidance=guidance if guidance else "Professional business presentation"
+    )
+
+# Keys cover provider and model but not the API key, so one cache serves every
+# service: entries outlive evicted services and carry over to a new key
+@lru_cache(maxsize=None)
+def _shared_response_cache() -> ResponseCache:
+    """Return the process-wide LLM response cache."""
+    return ResponseCache(RESPONSE_CACHE_SIZE, LLM_CACHE_DIR)
+
+@lru_cache(maxsize=None)
+def _shared_session() -> requests.Session:
+    """Return the process-wide requests session used for AIPipe, with pooling and retries."""
+    # A chat completion can be processed (and billed) before a 5xx or a dropped
+    # read, so POSTs are only resent when nothing was processed: connection
+    # failures, and 429/503 rejections (waiting out their Retry-After)
+    retry = Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=[429, 503],
+        raise_on_status=False,
+        allowed_methods=frozenset({'POST'})
+    )
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def _get_http_client():
+    """Return the process-wide httpx client, or None to let the SDK build its own."""
+    global _http_client
+    try:
+        import httpx
+    except ImportError:
+        return None
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS
+                )
+            )
+        return _http_client
+
+if ORJSON_AVAILABLE:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+else:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes like orjson.dumps."""
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+# Greedy match from the first '{' to the last '}' in a response
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Characters that matter when matching braces; everything else is skipped in C
+_JSON_STRUCTURAL_RE = re.compile(r'[{}"\\]')
+
+def _first_balanced_json_object(text: str, start: int = 0) -> Optional[str]:
+    """Return the first balanced {...} span at or after start, ignoring braces inside strings."""
+    start = text.find('{', start)
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    skip_to = -1
+    for match in _JSON_STRUCTURAL_RE.finditer(text, start):
+        i = match.start()
+        if i < skip_to:
+            continue
+        ch = match.group()
+        if in_string:
+            if ch == '\\':
+                # Skip the escaped character
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _is_valid_structure(structure: Any) -> bool:
+    """Check parsed JSON has the shape the generator needs: a non-empty list of slide objects."""
+    if not isinstance(structure, dict):
+        return False
+    slides = structure.get('slides')
+    return bool(slides) and isinstance(slides, list) and all(isinstance(slide, dict) for slide in slides)
+
+class _JsonObjectScanner:
+    """Incrementally tracks brace depth over streamed text to spot the end of the first JSON object."""
+    
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> bool:
+        """Consume a chunk of text; return True once the first object has closed."""
+        for ch in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif not self.started:
+                if ch == '{':
+                    self.started = True
+                    self.depth = 1
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+class _TokenBucket:
+    """Thread-safe token bucket allowing rate requests per period seconds."""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.fill_rate
+    
+    def acquire(self):
+        """Block until a request may be sent."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+class _SlideStreamParser:
+    """Incrementally picks complete slide objects out of a streamed {"slides": [...]} response."""
+    
+    def __init__(self):
+        self.stack = []
+        self.in_string = False
+        self.escaped = False
+        self.done = False
+        self._slide = None
+    
+    def feed(self, text: str) -> List[str]:
+        """Consume a chunk of text; return the JSON text of each slide object completed by it."""
+        slides = []
+        for ch in text:
+            if self.done:
+                break
+            if self._slide is not None:
+                self._slide.append(ch)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == '\\':
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif not self.stack:
+                # Skip any prose before the root object
+                if ch == '{':
+                    self.stack.append(ch)
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{' or ch == '[':
+                # An object directly inside a top-level array is a slide
+                if ch == '{' and self.stack == ['{', '[']:
+                    self._slide = [ch]
+                self.stack.append(ch)
+            elif ch == '}' or ch == ']':
+                self.stack.pop()
+                if self._slide is not None and len(self.stack) == 2:
+                    slides.append("".join(self._slide))
+                    self._slide = None
+                elif not self.stack:
+                    self.done = True
+        return slides
+
 class LLMService:
     """Service for interacting with different LLM providers."""
     
-    def __init__(self, provider: str, api_key: str):
+    def __init__(self, provider: str, api_key: Union[str, List[str]], semantic_cache: bool = False,
+                 semantic_cache_path: Optional[str] = None):
         self.provider = provider.lower()
-        self.api_key = api_key
+        # Several keys (a list, or comma-separated) spread calls round-robin across their rate limits
+        if isinstance(api_key, str):
+            api_key = api_key.split(',')
+        self.api_keys = [key.strip() for key in api_key if key.strip()] or ['']
+        self.api_key = self.api_keys[0]
+        self._key_cycle = itertools.count()
+        self._limiters = [_TokenBucket(LLM_RPM_PER_KEY) for _ in self.api_keys] if LLM_RPM_PER_KEY > 0 else None
+        self.model = PROVIDER_MODELS.get(self.provider)
+        self.max_tokens = 2000
+        self.temperature = 0.7
+        self._cache = _shared_response_cache() if LLM_CACHE_ENABLED else None
+        self.stats = {'hits': 0, 'misses': 0, 'semantic_hits': 0, 'notes_hits': 0}
+        self._semantic_cache = SemanticCache(path=semantic_cache_path) if semantic_cache else None
         self._setup_client()
     
     def _setup_client(self):
         """Setup the appropriate LLM client based on provider."""
         if self.provider == 'openai':
-            if not OPENAI_AVAILABLE:
-                raise ImportError("OpenAI package is required but not available")
-            self.client = OpenAI(api_key=self.api_key)
+            try:
+                from openai import OpenAI
+            except ImportError as e:
+                raise ImportError("OpenAI package is required but not available") from e
+            self._clients = [OpenAI(api_key=key, http_client=_get_http_client()) for key in self.api_keys]
+            self.client = self._clients[0]
         elif self.provider == 'anthropic':
-            if not ANTHROPIC_AVAILABLE:
-                raise ImportError("Anthropic package is required but not available")
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            try:
+                import anthropic
+            except ImportError as e:
+                raise ImportError("Anthropic package is required but not available") from e
+            self._clients = [anthropic.Anthropic(api_key=key, http_client=_get_http_client())
+                             for key in self.api_keys]
+            self.client = self._clients[0]
         elif self.provider == 'gemini':
-            if not GEMINI_AVAILABLE:
-                raise ImportError("Google GenerativeAI package is required but not available")
+            try:
+                import google.generativeai as genai
+            except Exception as e:
+                raise ImportError("Google GenerativeAI package is required but not available") from e
+            # genai.configure is process-wide, so only the first key is used
+            self.api_keys = self.api_keys[:1]
             genai.configure(api_key=self.api_key)
-            self.client = genai.GenerativeModel('gemini-pro')
+            self.client = genai.GenerativeModel(self.model)
         elif self.provider == 'aipipe':
             # AIPipe.org uses a custom API endpoint
             self.client = None  # We'll use requests directly
             self.api_base = "https://aipipe.org/api/v1"
+            # Keep-alive session shared by all services so repeat calls skip the TCP/TLS handshake
+            self._session = _shared_session()
+            self._auth_headers = [{'Authorization': f'Bearer {key}'} for key in self.api_keys]
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
     
-    def analyze_text_structure(self, text: str, guidance: str = "") -> Dict[str, Any]:
+    def analyze_text_structure(self, text: str, guidance: str = "",
+                               detail: Literal['full', 'compact'] = 'full') -> Dict[str, Any]:
         """
         Analyze input text and generate slide structure.
         
         Args:
             text: Input text to analyze
             guidance: Optional guidance for tone/structure
+            detail: 'compact' sends a short brief (schema and core rules) to save input tokens
             
         Returns:
             Dictionary with slide structure and content
         """
+        if self._is_trivial_input(text, guidance):
+            return self._fallback_structure(text)
+        
         prompt = self._create_structure_prompt(text, guidance)
         
         try:
-            response = self._make_llm_call(prompt)
+            response = self._make_llm_call(prompt, stop_at_json=True, deterministic=True,
+                                           system=_STRUCTURE_SYSTEM_PROMPTS[detail])
             return self._parse_structure_response(response)
         except Exception as e:
-            logger.error(f"Error analyzing text structure: {str(e)}")
+            logger.error("Error analyzing text structure: %s", e)
             return self._fallback_structure(text)
     
+    def analyze_text_structure_stream(self, text: str, guidance: str = "",
+                                      detail: Literal['full', 'compact'] = 'full') -> Iterator[Dict[str, Any]]:
+        """
+        Analyze input text and yield each slide as soon as the model has written it.
+        
+        A stream that breaks off is finished from a non-streaming retry. If the
+        retry fails, or doesn't begin with the slides already yielded, the error
+        propagates rather than leaving a deck with missing or repeated slides.
+        
+        Args:
+            text: Input text to analyze
+            guidance: Optional guidance for tone/structure
+            detail: 'compact' sends a short brief (schema and core rules) to save input tokens
+            
+        Yields:
+            Slide dictionaries, in presentation order
+        """
+        if self.provider not in ('openai', 'anthropic') or self._is_trivial_input(text, guidance):
+            yield from self.analyze_text_structure(text, guidance, detail).get('slides', [])
+            return
+        
+        prompt = self._create_structure_prompt(text, guidance)
+        system = _STRUCTURE_SYSTEM_PROMPTS[detail]
+        
+        cached = self._cached_response(prompt, 0.0, system)
+        if cached is not None:
+            yield from self._parse_structure_response(cached).get('slides', [])
+            return
+        
+        parser = _SlideStreamParser()
+        parts = []
+        yielded_titles = []
+        try:
+            chunks = self._stream_text(prompt, 0.0, system)
+            try:
+                for chunk in chunks:
+                    parts.append(chunk)
+                    for slide_json in parser.feed(chunk):
+                        slide = _json_loads(slide_json)
+                        yield slide
+                        yielded_titles.append(slide.get('title'))
+                    if parser.done:
+                        break
+            finally:
+                chunks.close()
+        except Exception as e:
+            logger.warning("Structure stream failed after %d slides, retrying without streaming: %s",
+                           len(yielded_titles), e)
+        else:
+            if parser.done:
+                self._store_response(prompt, "".join(parts), 0.0, system)
+            if yielded_titles:
+                if not parser.done:
+                    # Cut off (e.g. at max_tokens): keep the complete slides, but
+                    # don't cache JSON that a later hit couldn't parse
+                    logger.warning("Structure stream ended after %d slides without closing the JSON",
+                                   len(yielded_titles))
+                return
+            logger.warning("No slides found in streamed response, retrying without streaming")
+        
+        # The cache was checked above, so retry against the provider directly
+        try:
+            response = self._call_provider(prompt, 0.0, system)
+        except Exception as e:
+            if yielded_titles:
+                # Slides already handed out can't be completed or replaced; fail
+                # the request rather than end the deck early
+                raise
+            logger.error("Error analyzing text structure: %s", e)
+            yield from self._fallback_structure(text).get('slides', [])
+            return
+        
+        self._store_response(prompt, response, 0.0, system)
+        slides = self._parse_structure_response(response).get('slides', [])
+        # Temperature 0 usually reproduces the same slides, but providers don't
+        # guarantee it; only continue after them if the retry starts the same way
+        yielded = len(yielded_titles)
+        if [slide.get('title') for slide in slides[:yielded]] != yielded_titles:
+            raise RuntimeError(f"Structure retry does not match the {yielded} slides already streamed")
+        yield from slides[yielded:]
+    
     def generate_speaker_notes(self, slide_content: str) -> str:
         """
         Generate speaker notes for a slide.
@@ -90,7 +593,127 @@ class LLMService:
         Returns:
             Generated speaker notes
         """
-        prompt = f"""
+        prompt = self._create_notes_prompt(slide_content)
+        
+        try:
+            return self._make_llm_call(prompt).strip()
+        except Exception as e:
+            logger.error("Error generating speaker notes: %s", e)
+            return FALLBACK_SPEAKER_NOTES
+    
+    def generate_speaker_notes_batch(self, slide_contents: List[str]) -> List[str]:
+        """
+        Generate speaker notes for several slides with a single LLM call.
+        
+        Args:
+            slide_contents: Content of each slide, in presentation order
+            
+        Returns:
+            Generated speaker notes, one per slide
+        """
+        if not slide_contents:
+            return []
+        
+        # Slides whose content was seen before (regenerated decks) reuse their notes
+        notes_by_content, missing = self._cached_notes(slide_contents)
+        if missing:
+            notes_by_content.update(self._store_notes(missing, self._generate_notes_uncached(missing)))
+        return [notes_by_content[content] for content in slide_contents]
+    
+    def _generate_notes_uncached(self, slide_contents: List[str]) -> List[str]:
+        """Generate notes for distinct slide contents, in batched calls of NOTES_BATCH_SIZE."""
+        if len(slide_contents) <= NOTES_BATCH_SIZE:
+            return self._generate_notes_chunk(slide_contents)
+        
+        # Long decks: one batched call per chunk, issued in parallel
+        chunks = [slide_contents[i:i + NOTES_BATCH_SIZE]
+                  for i in range(0, len(slide_contents), NOTES_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=min(8, len(chunks))) as executor:
+            return [note for notes in executor.map(self._generate_notes_chunk, chunks) for note in notes]
+    
+    def _generate_notes_chunk(self, slide_contents: List[str]) -> List[str]:
+        """Generate notes for up to NOTES_BATCH_SIZE slides in one call, falling back to per-slide calls."""
+        prompt = self._create_notes_batch_prompt(slide_contents)
+        
+        try:
+            notes = self._parse_notes_batch_response(self._make_llm_call(prompt), len(slide_contents))
+            if notes is not None:
+                return notes
+            logger.warning("Batched speaker notes response was malformed, generating per slide")
+        except Exception as e:
+            logger.error("Error generating batched speaker notes: %s", e)
+        
+        # Fall back to one call per slide, issued in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(slide_contents))) as executor:
+            return list(executor.map(self.generate_speaker_notes, slide_contents))
+    
+    def _create_notes_batch_prompt(self, slide_contents: List[str]) -> str:
+        """Create the prompt used to generate speaker notes for several slides at once."""
+        slides = "\n\n".join(
+            f"Slide {i}:\n{content}" for i, content in enumerate(slide_contents, 1)
+        )
+        return f"""
+        Generate concise speaker notes for each of the {len(slide_contents)} slides below.
+        Keep them professional and helpful for a presenter.
+        
+        Return ONLY a JSON array with exactly {len(slide_contents)} strings, one per slide, in order.
+        
+        {slides}
+        """
+    
+    def _parse_notes_batch_response(self, response: str, expected: int) -> Optional[List[str]]:
+        """Parse a JSON array of speaker notes, returning None if it is unusable."""
+        start_idx = response.find('[')
+        end_idx = response.rfind(']') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            return None
+        
+        try:
+            notes = _json_loads(response[start_idx:end_idx])
+        except ValueError:
+            return None
+        
+        if not isinstance(notes, list) or len(notes) != expected:
+            return None
+        if not all(isinstance(note, str) for note in notes):
+            return None
+        return [note.strip() for note in notes]
+    
+    def _cached_notes(self, slide_contents: List[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Split slide contents into cached notes and the distinct contents still missing.
+        
+        Identical slides (common in fallback decks) are only generated once.
+        """
+        notes_by_content = {}
+        missing = []
+        for content in dict.fromkeys(slide_contents):
+            notes = self._cache.get(self._notes_cache_key(content)) if self._cache is not None else None
+            if notes is None:
+                missing.append(content)
+            else:
+                notes_by_content[content] = notes
+        self.stats['notes_hits'] += len(notes_by_content)
+        return notes_by_content, missing
+    
+    def _store_notes(self, slide_contents: List[str], notes: List[str]) -> Dict[str, str]:
+        """Cache freshly generated notes by slide content and return them as a mapping."""
+        notes_by_content = dict(zip(slide_contents, notes))
+        if self._cache is not None:
+            for content, note in notes_by_content.items():
+                # Placeholder notes from a failed call are worth retrying next time
+                if note and note != FALLBACK_SPEAKER_NOTES:
+                    self._cache.put(self._notes_cache_key(content), note)
+        return notes_by_content
+    
+    def _notes_cache_key(self, slide_content: str) -> str:
+        """Key notes by slide content, whichever batch they were generated in."""
+        # The exact cache only stores calls at temperature <= CACHEABLE_MAX_TEMPERATURE,
+        # so keys at the sampling temperature cannot collide with its entries
+        return self._cache_key(self._create_notes_prompt(slide_content), self.temperature)
+    
+    def _create_notes_prompt(self, slide_content: str) -> str:
+        """Create the prompt used to generate speaker notes for one slide."""
+        return f"""
         Generate concise speaker notes for this slide content. 
         Keep it professional and helpful for a presenter.
         
@@ -99,183 +722,176 @@ class LLMService:
         
         Speaker Notes:
         """
-        
-        try:
-            return self._make_llm_call(prompt).strip()
-        except Exception as e:
-            logger.error(f"Error generating speaker notes: {str(e)}")
-            return "Key points to discuss based on slide content."
     
     def _create_structure_prompt(self, text: str, guidance: str) -> str:
         """Create comprehensive prompt for professional presentation structure analysis."""
         # Clean the input text first
         cleaned_text = self._clean_input_text(text)
         
-        enhanced_prompt = f"""
-        🎯 EXECUTIVE PRESENTATION CONSULTANT BRIEF 🎯
-
-        You are an elite presentation strategist tasked with transforming raw content into a compelling, professional PowerPoint presentation. Your mission: Create presentation-ready content that maximizes impact while maintaining 100% fidelity to the source material.
-
-        📋 SOURCE CONTENT:
-        {cleaned_text}
-
-        🎯 PRESENTATION CONTEXT: {guidance if guidance else "Professional business presentation"}
-
-        🏆 EXCELLENCE STANDARDS:
-
-        ✅ CONTENT INTEGRITY:
-        - Every slide MUST derive directly from the provided content
-        - Preserve all specific metrics, dates, percentages, and technical details
-        - Expand and enhance source material, never add external information
-        - Transform complex paragraphs into clear, actionable insights
-
-        ✅ PROFESSIONAL IMPACT:
-        - Use executive-level language with strong value propositions
-        - Create compelling narratives that drive decision-making
-        - Structure content for visual consumption, not reading
-        - Include strategic insights and business implications
-
-        ✅ VISUAL OPTIMIZATION:
-        - Maximum 5 bullet points per slide
-        - Each bullet: 8-15 words with specific, measurable details
-        - Use active voice and power words
-        - Structure for maximum visual hierarchy and flow
-
-        ✅ ADVANCED FORMATTING:
-        - Zero encoding artifacts (_x000D_, _x000A_, etc.)
-        - No repetitive labels ("Analysis:", "Overview:")
-        - Varied, descriptive prefixes that add context
-        - Professional slide titles with clear value propositions
-
-        📊 REQUIRED OUTPUT STRUCTURE:
-
-        {{
-            "title": "Compelling Main Title (specific to content, not generic)",
-            "slides": [
-                {{
-                    "title": "Strategic Value-Driven Title",
-                    "content": [
-                        "Market Intelligence: $X.XB market growing XX% annually with specific trend analysis",
-                        "Competitive Advantage: Unique differentiator delivering measurable business value",
-                        "Implementation Strategy: Specific action with timeline and resource requirements",
-                        "ROI Projection: Quantified benefits with timeframe and success metrics",
-                        "Risk Mitigation: Specific challenge addressed with proven solution approach"
-                    ],
-                    "slide_type": "title|overview|strategy|analysis|implementation|conclusion",
-                    "emphasis_points": ["Key metric or statistic", "Critical success factor"],
-                    "speaking_notes": "Executive talking points with context and supporting details"
-                }}
-            ]
-        }}
-
-        🎨 CONTENT TRANSFORMATION EXAMPLES:
-
-        BEFORE (Raw): "The fitness app market is valued at $4.4 billion, growing 14.7% annually"
-        AFTER (Professional): "Market Opportunity: $4.4B fitness technology sector expanding 14.7% YoY"
-
-        BEFORE (Raw): "87% of people struggle with consistent workouts"
-        AFTER (Professional): "User Pain Point: 87% abandonment rate creates $3.8B addressable market gap"
-
-        BEFORE (Raw): "AI Personal Trainer with real-time form analysis"
-        AFTER (Professional): "Innovation Core: AI-powered form correction increases workout effectiveness 40%"
-
-        🚀 SLIDE ARCHITECTURE:
-        1. HOOK SLIDE: Compelling problem/opportunity with quantified impact
-        2. CONTEXT SLIDES: Market landscape, user needs, competitive positioning
-        3. SOLUTION SLIDES: Core value proposition with differentiated features
-        4. VALIDATION SLIDES: Evidence, metrics, proof points, testimonials
-        5. EXECUTION SLIDES: Implementation roadmap, resource requirements, timeline
-        6. IMPACT SLIDES: ROI projections, success metrics, scaling potential
-        7. ACTION SLIDE: Clear next steps with ownership and deadlines
-
-        💡 CONTENT ENHANCEMENT RULES:
-        - Transform features into benefits with business impact
-        - Convert data points into strategic insights
-        - Upgrade technical details into competitive advantages
-        - Elevate implementation details into strategic roadmaps
-        - Enhance outcomes into measurable value propositions
-
-        🎯 FINAL VALIDATION:
-        - Can a C-suite executive quickly grasp the value proposition?
-        - Does each slide advance the narrative toward a decision?
-        - Are all claims supported by specific evidence from source content?
-        - Would this presentation drive action and investment?
-
-        Generate 6-10 slides that tell a compelling story while honoring every detail of the source material.
-        """
-        
-        return enhanced_prompt
+        return _build_structure_prompt(cleaned_text, guidance)
+    
+    def _is_trivial_input(self, text: str, guidance: str) -> bool:
+        """Whether the input is too short for an LLM call to improve on the local fallback."""
+        return not guidance.strip() and len(self._clean_input_text(text)) < DIRECT_FALLBACK_MAX_CHARS
     
     def _clean_input_text(self, text: str) -> str:
         """Clean and format input text to remove encoding issues and improve structure."""
         if not text:
             return text
-            
-        # Remove common encoding artifacts
-        cleaned = text.replace('_x000D_', '\n')
-        cleaned = cleaned.replace('_x000A_', '\n')
-        cleaned = cleaned.replace('\\n', '\n')
-        cleaned = cleaned.replace('\\r', '')
         
-        # Clean up multiple newlines
-        cleaned = '\n'.join(line.strip() for line in cleaned.split('\n') if line.strip())
+        # Remove common encoding artifacts (str.replace is a fast C scan, and
+        # every artifact becomes whitespace that is collapsed below anyway)
+        cleaned = text
+        if '_x000' in cleaned:
+            cleaned = cleaned.replace('_x000D_', '\n').replace('_x000A_', '\n')
+        if '\\' in cleaned:
+            cleaned = cleaned.replace('\\n', '\n').replace('\\r', '')
         
-        # Remove excessive whitespace
-        cleaned = ' '.join(cleaned.split())
+        # Collapse all whitespace (including the newlines) and drop markdown markers
+        return ' '.join(cleaned.split()).replace('#', '').replace('*', '')
+    
+    def _make_llm_call(self, prompt: str, stop_at_json: bool = False, deterministic: bool = False,
+                       system: Optional[str] = None) -> str:
+        """Make API call to the configured LLM provider, serving repeats from cache.
         
-        # Fix common markdown formatting issues
-        cleaned = cleaned.replace('#', '')
-        cleaned = cleaned.replace('**', '')
-        cleaned = cleaned.replace('*', '')
+        With stop_at_json the response is streamed (where the provider supports it)
+        and the connection is closed as soon as the first JSON object is complete.
+        With deterministic the call is made at temperature 0, which also makes it
+        eligible for the exact response cache. A static system prompt is sent
+        ahead of the prompt so providers can cache it as a shared prefix.
+        """
+        temperature = 0.0 if deterministic else self.temperature
+        cached = self._cached_response(prompt, temperature, system)
+        if cached is not None:
+            return cached
         
-        return cleaned
+        response = None
+        if stop_at_json and self.provider in ('openai', 'anthropic'):
+            try:
+                response = self._stream_until_json(prompt, temperature, system)
+            except Exception as e:
+                logger.warning("Streaming call failed, retrying without streaming: %s", e)
+        if response is None:
+            response = self._call_provider(prompt, temperature, system)
+        self._store_response(prompt, response, temperature, system)
+        return response
     
-    def _make_llm_call(self, prompt: str) -> str:
-        """Make API call to the configured LLM provider."""
+    def _cached_response(self, prompt: str, temperature: float, system: Optional[str] = None) -> Optional[str]:
+        """Look the prompt up in the exact and semantic response caches."""
+        if self._cache is not None and temperature <= CACHEABLE_MAX_TEMPERATURE:
+            cached = self._cache.get(self._cache_key(prompt, temperature, system))
+            if cached is not None:
+                self.stats['hits'] += 1
+                return cached
+            self.stats['misses'] += 1
+        
+        if self._semantic_cache is not None:
+            cached = self._semantic_cache.get(self._cache_scope(), prompt)
+            if cached is not None:
+                self.stats['semantic_hits'] += 1
+                return cached
+        
+        return None
+    
+    def _store_response(self, prompt: str, response: str, temperature: float, system: Optional[str] = None):
+        """Record a fresh provider response in the enabled caches."""
+        if self._cache is not None and temperature <= CACHEABLE_MAX_TEMPERATURE:
+            self._cache.put(self._cache_key(prompt, temperature, system), response)
+        
+        if self._semantic_cache is not None:
+            self._semantic_cache.put(self._cache_scope(), prompt, response)
+    
+    def _cache_scope(self) -> str:
+        """Scope that semantic cache entries are shared within."""
+        return f"{self.provider}:{self.model}"
+    
+    def _cache_key(self, prompt: str, temperature: float, system: Optional[str] = None) -> str:
+        """Build a stable cache key from everything that determines the response."""
+        payload = {
+            'provider': self.provider,
+            'model': self.model,
+            'system': system,
+            'prompt': prompt,
+            'max_tokens': self.max_tokens,
+            'temperature': temperature
+        }
+        if ORJSON_AVAILABLE:
+            serialized = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+        else:
+            serialized = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.sha256(serialized).hexdigest()
+    
+    def _chat_messages(self, prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        """Build chat messages with the static system prompt ahead of the variable prompt."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _anthropic_system(self, system: Optional[str]) -> Dict[str, Any]:
+        """Build Anthropic's system argument, marked for prompt caching."""
+        if not system:
+            return {}
+        return {'system': [{'type': 'text', 'text': system, 'cache_control': {'type': 'ephemeral'}}]}
+    
+    def _next_key(self) -> int:
+        """Pick the index of the API key to use for the next call, round-robin."""
+        return next(self._key_cycle) % len(self.api_keys)
+    
+    def _acquire_key(self) -> int:
+        """Pick the next API key and wait for its rate limit, if one is configured."""
+        index = self._next_key()
+        if self._limiters is not None:
+            self._limiters[index].acquire()
+        return index
+    
+    def _call_provider(self, prompt: str, temperature: float, system: Optional[str] = None) -> str:
+        """Send the prompt to the configured LLM provider."""
+        index = self._acquire_key()
+        
         if self.provider == 'openai':
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2000,
-                temperature=0.7
+            response = self._clients[index].chat.completions.create(
+                model=self.model,
+                messages=self._chat_messages(prompt, system),
+                max_tokens=self.max_tokens,
+                temperature=temperature
             )
             return response.choices[0].message.content
         
         elif self.provider == 'anthropic':
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=2000,
-                messages=[{"role": "user", "content": prompt}]
+            response = self._clients[index].messages.create(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}],
+                **self._anthropic_system(system)
             )
             return response.content[0].text
         
         elif self.provider == 'gemini':
-            response = self.client.generate_content(prompt)
+            response = self.client.generate_content(
+                f"{system}\n\n{prompt}" if system else prompt,
+                generation_config={'max_output_tokens': self.max_tokens, 'temperature': temperature}
+            )
             return response.text
         
         elif self.provider == 'aipipe':
-            # AIPipe.org API call using requests
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
+            # AIPipe.org API call over the pooled session
             payload = {
-                'model': 'gpt-3.5-turbo',  # Default model, can be configured
-                'messages': [{'role': 'user', 'content': prompt}],
-                'max_tokens': 2000,
-                'temperature': 0.7
+                'model': self.model,
+                'messages': self._chat_messages(prompt, system),
+                'max_tokens': self.max_tokens,
+                'temperature': temperature
             }
             
-            response = requests.post(
+            response = self._session.post(
                 f"{self.api_base}/chat/completions",
-                headers=headers,
-                json=payload,
+                headers=self._auth_headers[index],
+                data=_json_dumps(payload),
                 timeout=60
             )
             
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 return result['choices'][0]['message']['content']
             else:
                 raise Exception(f"AIPipe API error: {response.status_code} - {response.text}")
@@ -283,40 +899,107 @@ class LLMService:
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    def _stream_until_json(self, prompt: str, temperature: float, system: Optional[str] = None) -> str:
+        """Stream a completion and stop reading once the first JSON object has closed."""
+        scanner = _JsonObjectScanner()
+        parts = []
+        chunks = self._stream_text(prompt, temperature, system)
+        try:
+            for text in chunks:
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        finally:
+            # Drops the connection instead of reading the remaining tokens
+            chunks.close()
+        return "".join(parts)
+    
+    def _stream_text(self, prompt: str, temperature: float, system: Optional[str] = None) -> Iterator[str]:
+        """Yield the completion text as it arrives; closing the generator closes the connection."""
+        index = self._acquire_key()
+        
+        if self.provider == 'openai':
+            stream = self._clients[index].chat.completions.create(
+                model=self.model,
+                messages=self._chat_messages(prompt, system),
+                max_tokens=self.max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            try:
+                for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        yield text
+            finally:
+                stream.response.close()
+        
+        elif self.provider == 'anthropic':
+            with self._clients[index].messages.stream(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}],
+                **self._anthropic_system(system)
+            ) as stream:
+                yield from stream.text_stream
+        
+        else:
+            raise ValueError(f"Streaming is not supported for provider: {self.provider}")
+    
     def _parse_structure_response(self, response: str) -> Dict[str, Any]:
         """Parse the LLM response into structured data."""
+        # Bare JSON (the usual case) parses in one pass without searching for braces
+        stripped = response.strip()
+        if stripped.startswith('{') and stripped.endswith('}'):
+            try:
+                structure = _json_loads(stripped)
+                if _is_valid_structure(structure):
+                    return structure
+            except ValueError:
+                pass
+        
+        # Try to extract JSON from response
+        match = _JSON_OBJECT_RE.search(response)
+        if not match:
+            logger.warning("No JSON found in LLM response")
+            return self._fallback_structure(response)
+        
         try:
-            # Try to extract JSON from response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx != 0:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                raise ValueError("No JSON found in response")
+            structure = _json_loads(match.group(0))
+        except ValueError:
+            # Trailing prose with braces defeats the greedy match; retry with the first balanced object
+            json_str = _first_balanced_json_object(response, match.start())
+            try:
+                structure = _json_loads(json_str) if json_str is not None else None
+            except ValueError as e:
+                logger.warning("Failed to parse LLM response as JSON: %s", e)
+                structure = None
         
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.warning(f"Failed to parse LLM response as JSON: {str(e)}")
+        if structure is None:
+            return self._fallback_structure(response)
+        if not _is_valid_structure(structure):
+            logger.warning("LLM response JSON does not match the slide schema")
             return self._fallback_structure(response)
+        return structure
     
     def _fallback_structure(self, text: str) -> Dict[str, Any]:
         """Create an enhanced fallback structure when LLM parsing fails."""
         # Clean the text first
         cleaned_text = self._clean_input_text(text)
         
-        # Enhanced text splitting
-        sentences = [s.strip() for s in cleaned_text.split('.') if s.strip() and len(s.strip()) > 15]
-        paragraphs = [p.strip() for p in cleaned_text.split('\n') if p.strip() and len(p.strip()) > 20]
-        
-        # Use paragraphs if available, otherwise sentences
-        content_chunks = paragraphs if len(paragraphs) > 2 else sentences
+        # Use paragraphs if available, otherwise sentences (only split again when needed)
+        content_chunks = [p for p in (p.strip() for p in cleaned_text.split('\n')) if len(p) > 20]
+        if len(content_chunks) <= 2:
+            content_chunks = [s for s in (s.strip() for s in cleaned_text.split('.')) if len(s) > 15]
         
         slides = []
         
         # Extract title from content if possible
-        title_candidates = [chunk for chunk in content_chunks if len(chunk) < 80 and ':' not in chunk]
-        presentation_title = title_candidates[0] if title_candidates else "Professional Presentation"
+        presentation_title = next(
+            (chunk for chunk in content_chunks if len(chunk) < 80 and ':' not in chunk),
+            "Professional Presentation"
+        )
         
         # Title slide with better content
         slides.append({
@@ -334,19 +1017,20 @@ class LLMService:
         })
         
         # Process content with better categorization
-        section_headers = ["Market Overview", "Key Features", "Implementation", "Benefits", "Results"]
-        content_categories = ["Market Analysis", "Product Features", "Technical Specs", "Business Impact", "Success Metrics"]
+        section_headers = _SECTION_HEADERS
+        content_categories = _CONTENT_CATEGORIES
         
         processed_slides = 0
         for i, chunk in enumerate(content_chunks[:15]):  # Limit to reasonable number
             if len(chunk) < 10:
                 continue
+            category_idx = i % len(content_categories)
                 
             # Create section headers periodically
             if processed_slides > 0 and processed_slides % 3 == 0 and processed_slides < len(section_headers):
-                section_idx = (processed_slides // 3) - 1
+                section_idx = ((processed_slides // 3) - 1) % len(section_headers)
                 slides.append({
-                    "title": section_headers[section_idx % len(section_headers)],
+                    "title": section_headers[section_idx],
                     "content": [
                         "Strategic Focus: Core objectives and priorities",
                         "Key Components: Essential elements and features",
@@ -354,7 +1038,7 @@ class LLMService:
                     ],
                     "slide_type": "section",
                     "emphasis_points": ["Critical milestone"],
-                    "speaking_notes": f"Transition to {section_headers[section_idx % len(section_headers)]} section with detailed analysis."
+                    "speaking_notes": _SECTION_NOTES[section_idx]
                 })
             
             # Enhanced content processing
@@ -362,11 +1046,11 @@ class LLMService:
             
             # Split content intelligently
             if ':' in chunk:
-                parts = chunk.split(':')
-                for j, part in enumerate(parts):
-                    if part.strip() and len(part.strip()) > 5:
-                        category = content_categories[j % len(content_categories)]
-                        processed_content.append(f"{category}: {part.strip()}")
+                parts = (part.strip() for part in chunk.split(':'))
+                processed_content = [
+                    f"{content_categories[j % len(content_categories)]}: {part}"
+                    for j, part in enumerate(parts) if len(part) > 5
+                ]
             else:
                 # Break long content into meaningful pieces
                 words = chunk.split()
@@ -377,26 +1061,17 @@ class LLMService:
                     processed_content.append(f"Overview: {part1}")
                     processed_content.append(f"Details: {part2}")
                 else:
-                    category = content_categories[i % len(content_categories)]
-                    processed_content.append(f"{category}: {chunk}")
+                    processed_content.append(f"{content_categories[category_idx]}: {chunk}")
             
-            # Enhance with additional context points
-            while len(processed_content) < 4:
-                enhancement_points = [
-                    "Strategic Importance: Critical for business success",
-                    "Implementation Timeline: Phased approach over 6 months", 
-                    "Success Metrics: Measurable KPIs and benchmarks",
-                    "Risk Mitigation: Comprehensive contingency planning",
-                    "Stakeholder Impact: Benefits across all departments"
-                ]
-                processed_content.append(enhancement_points[len(processed_content) % len(enhancement_points)])
+            # Pad sparse slides up to 4 points with additional context (a no-op slice otherwise)
+            processed_content += _ENHANCEMENT_POINTS[len(processed_content):4]
             
             slides.append({
-                "title": f"{content_categories[i % len(content_categories)]} Deep Dive",
+                "title": _DEEP_DIVE_TITLES[category_idx],
                 "content": processed_content[:5],  # Limit to 5 points
                 "slide_type": "content",
-                "emphasis_points": [f"Key insight #{processed_slides + 1}"],
-                "speaking_notes": f"Detailed analysis of {content_categories[i % len(content_categories)].lower()} with supporting data and strategic implications."
+                "emphasis_points": [_KEY_INSIGHT % (processed_slides + 1)],
+                "speaking_notes": _DEEP_DIVE_NOTES[category_idx]
             })
             
             processed_slides += 1
@@ -421,97 +1096,43 @@ class LLMService:
             "slides": slides
         }
 
-    def _extract_metrics(self, text: str) -> List[str]:
-        """Extract financial and numerical metrics from text."""
-        import re
-        metrics = []
-        
-        # Pattern for financial figures
-        financial_patterns = [
-            r'\$[\d,]+\.?\d*[BMK]?',  # $4.4B, $2.4M, etc.
-            r'[\d,]+%',  # 14.7%, 87%, etc.
-            r'[\d,]+\.?\d*\s*billion',
-            r'[\d,]+\.?\d*\s*million',
-            r'[\d,]+\.?\d*\s*annually'
-        ]
-        
-        for pattern in financial_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            metrics.extend(matches)
-        
-        return metrics[:5]  # Limit to top 5 metrics
-    
-    def _extract_features(self, text: str) -> List[str]:
-        """Extract key features and capabilities from text."""
-        feature_keywords = [
-            'AI', 'artificial intelligence', 'machine learning', 'cloud-native',
-            'real-time', 'personalized', 'biometric', 'TensorFlow', 'React Native',
-            'Node.js', 'PostgreSQL', 'AWS', 'analytics', 'automation'
-        ]
-        
-        features = []
-        sentences = text.split('.')
-        
-        for sentence in sentences:
-            for keyword in feature_keywords:
-                if keyword.lower() in sentence.lower() and len(sentence.strip()) > 20:
-                    features.append(sentence.strip())
-                    break
-        
-        return list(set(features))[:5]  # Remove duplicates and limit
-    
-    def _extract_business_concepts(self, text: str) -> List[str]:
-        """Extract business and strategic concepts from text."""
-        business_terms = []
-        concepts = [
-            'market opportunity', 'revenue model', 'competitive advantage',
-            'value proposition', 'growth strategy', 'user experience',
-            'business model', 'market share', 'ROI', 'scalability'
-        ]
-        
-        sentences = text.split('.')
-        for sentence in sentences:
-            for concept in concepts:
-                if concept.lower() in sentence.lower():
-                    business_terms.append(sentence.strip())
-                    break
+_services: "OrderedDict[tuple, LLMService]" = OrderedDict()
+_services_lock = threading.Lock()
+
+def _service_key(provider: str, api_key: str) -> tuple:
+    """Build the registry key; only a hash of the API key is kept."""
+    return (provider, hashlib.sha256(api_key.encode('utf-8')).hexdigest())
+
+def get_llm_service(provider: str, api_key: str) -> LLMService:
+    """
+    Get a shared LLMService for a provider and API key, creating it if needed.
+    
+    Reusing the service keeps the SDK client, its connection pool and the
+    response cache warm across requests.
+    
+    Args:
+        provider: LLM provider name
+        api_key: API key for the provider
         
-        return list(set(business_terms))[:3]
-    
-    def _extract_smart_title(self, text: str) -> str:
-        """Extract or generate intelligent title from content."""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        # Look for title patterns
-        for line in lines[:5]:  # Check first 5 lines
-            if any(indicator in line.lower() for indicator in ['app:', 'product:', 'strategy:', 'solution:']):
-                # Clean and format the title
-                title = line.replace(':', '').replace('#', '').strip()
-                if len(title) < 80:
-                    return title
-        
-        # Extract product/service names
-        import re
-        product_pattern = r'([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*(?:\s+(?:App|Platform|System|Solution|Strategy)))'
-        matches = re.findall(product_pattern, text)
-        
-        if matches:
-            return matches[0]
-        
-        # Fallback to generic business title
-        return "Strategic Business Initiative"
-    
-    def _determine_content_type(self, text: str) -> str:
-        """Determine the type of content for better structuring."""
-        text_lower = text.lower()
-        
-        if any(term in text_lower for term in ['product launch', 'app', 'platform', 'solution']):
-            return 'product'
-        elif any(term in text_lower for term in ['strategy', 'transformation', 'implementation']):
-            return 'strategy'
-        elif any(term in text_lower for term in ['market', 'analysis', 'research', 'study']):
-            return 'analysis'
-        elif any(term in text_lower for term in ['education', 'training', 'learning', 'course']):
-            return 'education'
-        else:
-            return 'general'
+    Returns:
+        LLMService instance
+    """
+    key = _service_key(provider, api_key)
+    with _services_lock:
+        service = _services.get(key)
+        if service is not None:
+            _services.move_to_end(key)
+            return service
+    
+    service = LLMService(provider, api_key)
+    with _services_lock:
+        _services[key] = service
+        _services.move_to_end(key)
+        while len(_services) > SERVICE_CACHE_SIZE:
+            _services.popitem(last=False)
+    return service
+
+def evict_llm_service(provider: str, api_key: str):
+    """Drop a shared service so the next request builds a fresh client."""
+    with _services_lock:
+        _services.pop(_service_key(provider, api_key), None)
@@ -1,144 +1,448 @@
 from pptx import Presentation
 from pptx.util import Inches, Pt
+from pptx.enum.shapes import PP_PLACEHOLDER
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import NotesSlidePart
+from pptx.oxml.xmlchemy import OxmlElement
+from pptx.text.text import Font, _Paragraph
+from copy import deepcopy
+import io
+import os
 import tempfile
 import logging
 import re
-from typing import Dict, List, Any
-from .llm_service import LLMService
-from .template_analyzer import TemplateAnalyzer
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Any
+
+# Only needed for annotations; importing llm_service pulls in requests and the
+# response caches, which callers that just render a structure don't need
+if TYPE_CHECKING:
+    from .llm_service import LLMService
+    from .template_analyzer import TemplateAnalyzer
 
 logger = logging.getLogger(__name__)
 
+# Sizes and colors applied to every title, paragraph and run, built once
+# instead of converting to EMU (or allocating an RGBColor) per call
+_TITLE_LEFT = Inches(0.5)
+_TITLE_TOP = Inches(0.15)
+_TITLE_HEIGHT = Inches(1.8)
+_TITLE_MARGIN_X = Inches(0.2)
+_TITLE_MARGIN_Y = Inches(0.15)
+_CONTENT_LEFT = Inches(0.8)
+_CONTENT_TOP = Inches(2.5)
+_CONTENT_MARGIN_X = Inches(0.4)
+_CONTENT_MARGIN_Y = Inches(0.3)
+_TITLE_FONT_SIZE = Pt(48)
+_TITLE_SPACE_AFTER = Pt(28)
+_TITLE_SPACE_BEFORE = Pt(8)
+_TITLE_SLIDE_FONT_SIZE = Pt(28)
+_SECTION_FONT_SIZE = Pt(24)
+_BODY_FONT_SIZE = Pt(22)
+_SUB_FONT_SIZE = Pt(20)
+_EMPHASIS_FONT_SIZE = Pt(14)
+_BULLET_SPACE_AFTER = Pt(10)
+_SUB_BULLET_SPACE_AFTER = Pt(8)
+_TEXTBOX_BULLET_SPACE_AFTER = Pt(12)
+_CONTENT_LINE_HEIGHT = Pt(30)
+# (left, top, width, height) of fixed-position boxes: an image with captions to
+# its right, an image centered below the title, and the emphasis callout strip
+_SIDE_IMAGE_BOX = (Inches(0.5), Inches(2.2), Inches(5.5), Inches(4))
+_SIDE_CAPTION_BOX = (Inches(6.2), Inches(2.5), Inches(3.3), Inches(3.5))
+_CENTERED_IMAGE_BOX = (Inches(1.5), Inches(2.5), Inches(7), Inches(4))
+_EMPHASIS_BOX = (Inches(1), Inches(6), Inches(8), Inches(1))
+# Longer titles and bullets are cut and end in "..."
+_MAX_TITLE_CHARS = 60
+_MAX_BULLET_CHARS = 180
+_WHITE = RGBColor(255, 255, 255)
+_TITLE_TEXT_COLOR = RGBColor(20, 20, 20)
+_BODY_TEXT_COLOR = RGBColor(40, 40, 40)
+_EMPHASIS_COLOR = RGBColor(180, 60, 0)
+
+# Layout names that can hold an image beside text ('two content' is covered by 'content')
+_IMAGE_LAYOUT_NAME = re.compile(r'content|text|bullet')
+
+# Markdown header markers and the "Analysis:" filler LLMs prepend to titles
+_MARKDOWN_HEADER = re.compile(r'#+\s*')
+_ANALYSIS_PREFIX = re.compile(r'Analysis:\s*', re.IGNORECASE)
+
+# Bullet symbols per slide type, cycled through the items; comparisons alternate sides
+_BULLET_SYMBOLS = {
+    'comparison': ("▶", "◀"),
+    'section': ("◆",),
+}
+_DEFAULT_BULLET_SYMBOLS = ("●",)
+# Items starting with any of these already carry a bullet
+_BULLET_PREFIXES = ('●', '•', '-', '▶', '◀', '◆')
+
+# Prefix for unlabelled bullets by keyword, checked in order; substring tests on
+# the lowercased item measured faster than a regex alternation or an automaton
+_CONTENT_CATEGORIES = (
+    (('market', 'revenue', 'growth'), "Market Insight: "),
+    (('feature', 'benefit', 'advantage'), "Key Benefit: "),
+    (('strategy', 'plan', 'approach'), "Strategic Approach: "),
+    (('result', 'outcome', 'impact'), "Expected Outcome: "),
+)
+
+# Bulleted caption shown beside every user image
+_IMAGE_CAPTIONS = tuple(f"• {item}" for item in (
+    "Key visual supporting our strategic analysis",
+    "Important data visualization and insights",
+    "Critical business intelligence demonstration",
+    "Contextual evidence and supporting material",
+    "Strategic decision-making reference"
+))
+
+@lru_cache(maxsize=64)
+def _hex_to_rgb(color: str) -> RGBColor:
+    """Parse a '#RRGGBB' theme color once; templates reuse a handful of colors."""
+    # bytes.fromhex decodes all three channels in one call and also rejects
+    # stray signs or underscores that int(color, 16) would accept
+    channels = bytes.fromhex(color.lstrip('#'))
+    if len(channels) != 3:
+        raise ValueError(f"Expected a #RRGGBB color, got {color!r}")
+    # RGBColor is a tuple, so callers can unpack it or assign it to a font directly
+    return RGBColor(*channels)
+
+# Rec. 601 luma weights scaled to integers, so brightness checks compare
+# against these instead of dividing: 0.5 and 0.6 of the 255000 maximum
+_DARK_BACKGROUND_LUMA = 127500
+_DARK_TEXT_LUMA = 153000
+
+@lru_cache(maxsize=64)
+def _luma(color: str) -> int:
+    """Perceived brightness of a '#RRGGBB' color, from 0 (black) to 255000 (white)."""
+    r, g, b = _hex_to_rgb(color)
+    return 299 * r + 587 * g + 114 * b
+
 class PresentationGenerator:
-    def __init__(self, llm_service: LLMService, template_analyzer: TemplateAnalyzer):
+    def __init__(self, llm_service: 'LLMService', template_analyzer: 'TemplateAnalyzer'):
         self.llm_service = llm_service
         self.template_analyzer = template_analyzer
         self.user_images = []
+        self._pending_notes = []
+        self._image_blobs = {}
+        self._image_layout_index = None
+        self._slide_skeletons = {}
+        self._notes_skeleton = None
+        self._layouts = []
+        self._load_theme()
+    
+    def _load_theme(self):
+        # The template never changes, so resolve fonts, colors and sizes once instead of per run
+        self._fonts = self.template_analyzer.get_theme_fonts()
+        self._colors = self.template_analyzer.get_theme_colors()
+        self._slide_width, self._slide_height = self.template_analyzer.get_slide_dimensions()
+        self._title_width = self._slide_width - Inches(1)
+        self._content_width = self._slide_width - _CONTENT_LEFT * 2
+        self._content_height = self._slide_height - Inches(4.2)
+        # Bullets that fit below the title at two 30pt lines each, capped at 8
+        self._max_content_items = min(
+            int((self._slide_height - Inches(4.5)) / _CONTENT_LINE_HEIGHT) // 2, 8
+        )
+        self._dark_background = self._is_dark_background(self.template_analyzer.get_background_colors())
+        self._primary_rgb = None
+        self._contrast_primary_rgb = None
+        try:
+            if 'primary' in self._colors:
+                # Both lookups share the cached parse of the primary color
+                self._primary_rgb = _hex_to_rgb(self._colors['primary'])
+                # Only dark enough primaries are readable as text, and only on a
+                # light background; dark backgrounds always get white text
+                if not self._dark_background and self._is_color_dark_enough(self._colors['primary']):
+                    self._contrast_primary_rgb = self._primary_rgb
+        except Exception as e:
+            logger.warning("Could not parse primary theme color: %s", e)
+        
+        self._body_font = self._fonts.get('body', 'Calibri')
+        # Text colors only depend on the theme: white on dark backgrounds, otherwise
+        # a dark primary color when the theme has one, near-black if not
+        self._title_text_rgb = self._text_rgb(_TITLE_TEXT_COLOR)
+        self._body_text_rgb = self._text_rgb(_BODY_TEXT_COLOR)
+        # Layout index per slide type, resolved from the template on first use
+        self._layout_indices = {}
+        
+        # Every title run gets identical formatting; build the <a:rPr> once and
+        # copy it into each run instead of setting five font properties per run
+        self._title_rpr = self._build_title_rpr(self._title_text_rgb)
+        # Manual titles sit on a plain textbox and always use the primary color
+        self._manual_title_rpr = self._build_title_rpr(
+            self._primary_rgb if self._primary_rgb is not None else self._title_text_rgb
+        )
+        # Emphasis callouts are bold 14pt, orange or white on dark backgrounds
+        self._emphasis_rpr = OxmlElement('a:rPr')
+        font = Font(self._emphasis_rpr)
+        font.size = _EMPHASIS_FONT_SIZE
+        font.bold = True
+        font.color.rgb = _WHITE if self._dark_background else _EMPHASIS_COLOR
+        # Body text formatting only varies with slide type; see _content_rpr
+        self._content_rprs = {}
+        # Styled <a:p> per (level, spacing, run properties), copied for each bullet
+        self._paragraph_templates = {}
+    
+    def _text_rgb(self, light_background_rgb: RGBColor) -> RGBColor:
+        if self._dark_background:
+            return _WHITE
+        if self._contrast_primary_rgb is not None:
+            return self._contrast_primary_rgb
+        return light_background_rgb
+    
+    def _build_title_rpr(self, rgb: RGBColor):
+        rPr = OxmlElement('a:rPr')
+        font = Font(rPr)
+        font.name = self._fonts.get('title', 'Arial Black')
+        font.size = _TITLE_FONT_SIZE
+        font.bold = True
+        font.underline = True
+        font.color.rgb = rgb
+        return rPr
+    
+    def _content_rpr(self, slide_type: str, is_sub: bool):
+        if is_sub:
+            style = 'sub'
+        elif slide_type in ('title', 'section'):
+            style = slide_type
+        else:
+            style = 'body'
+        is_title = slide_type in ('title', 'section')
+        rPr = self._content_rprs.get((style, is_title))
+        if rPr is None:
+            rPr = OxmlElement('a:rPr')
+            font = Font(rPr)
+            font.name = self._body_font
+            if style == 'sub':
+                font.size = _SUB_FONT_SIZE
+                font.italic = True
+            elif style == 'title':
+                font.size = _TITLE_SLIDE_FONT_SIZE
+                font.bold = True
+            elif style == 'section':
+                font.size = _SECTION_FONT_SIZE
+                font.bold = True
+            else:
+                font.size = _BODY_FONT_SIZE
+            font.color.rgb = self._title_text_rgb if is_title else self._body_text_rgb
+            self._content_rprs[(style, is_title)] = rPr
+        return rPr
+    
+    def _apply_rpr(self, paragraph, rPr):
+        for r in paragraph._p.r_lst:
+            r._remove_rPr()
+            r._insert_rPr(deepcopy(rPr))
     
     def generate(self, text_input: str, guidance: str = "", image_paths: List[str] = None) -> str:
         logger.info("Starting presentation generation")
-        self.user_images = image_paths or []
-        structure = self.llm_service.analyze_text_structure(text_input, guidance)
+        # Uploads with the same filename are saved to the same path; show each file once
+        self.user_images = list(dict.fromkeys(image_paths or []))
         presentation = self._create_presentation_from_template()
-        self._generate_slides_with_images(presentation, structure)
+        # Slides are built as the model streams them rather than after the full response
+        slides = self.llm_service.analyze_text_structure_stream(text_input, guidance)
+        self._generate_slides_with_images(presentation, {'slides': slides})
         output_path = self._save_presentation(presentation)
-        logger.info(f"Presentation generated successfully: {output_path}")
+        logger.info("Presentation generated successfully: %s", output_path)
         return output_path
     
     def _create_presentation_from_template(self) -> Presentation:
         try:
             return Presentation(self.template_analyzer.template_path)
         except Exception as e:
-            logger.warning(f"Could not use template directly: {str(e)}")
+            logger.warning("Could not use template directly: %s", e)
             return Presentation()
     
     def _generate_slides_with_images(self, presentation: Presentation, structure: Dict[str, Any]):
-        # Clear existing slides
-        for i in reversed(range(len(presentation.slides))):
-            r_id = presentation.slides._sldIdLst[i].rId
-            presentation.part.drop_rel(r_id)
-            del presentation.slides._sldIdLst[i]
+        # Clear existing slides: empty the slide list in one pass, then drop the
+        # now unreferenced relationships directly (drop_rel rescans the XML per call)
+        sld_id_lst = presentation.slides._sldIdLst
+        r_ids = [sld_id.rId for sld_id in sld_id_lst]
+        for sld_id in list(sld_id_lst):
+            sld_id_lst.remove(sld_id)
+        rels = presentation.part.rels
+        for r_id in r_ids:
+            rels.pop(r_id)
+        
+        self._install_partname_allocator(presentation)
         
         slides_data = structure.get('slides', [])
         image_index = 0
+        self._pending_notes = []
+        self._image_blobs = {}
+        self._image_layout_index = None
+        self._slide_skeletons = {}
+        self._notes_skeleton = None
+        # Each slide_layouts[i] rebuilds the master and layout proxies; index a snapshot
+        self._layouts = list(presentation.slide_layouts)
         
+        create_slide = self._create_slide
+        create_image_slide = self._create_image_slide
+        images = self.user_images
+        image_count = len(images)
         for i, slide_data in enumerate(slides_data):
-            self._create_slide(presentation, slide_data)
-            if (self.user_images and image_index < len(self.user_images) and 
+            create_slide(presentation, slide_data)
+            if (image_index < image_count and 
                 slide_data.get('slide_type') == 'content' and (i + 1) % 3 == 0):
-                self._create_image_slide(presentation, self.user_images[image_index], i + 1)
+                create_image_slide(presentation, images[image_index], i + 1)
                 image_index += 1
+        
+        self._fill_pending_notes()
+
+    def _install_partname_allocator(self, presentation: Presentation):
+        # python-pptx names each new notes slide by walking every part in the package,
+        # which is quadratic in deck size. Walk once per name pattern and hand out the
+        # following names from memory; the presentation is only ever used for this deck.
+        package = presentation.part.package
+        used_by_prefix = {}
+        
+        def next_partname(tmpl):
+            prefix = tmpl[:(tmpl % 42).find('42')]
+            used = used_by_prefix.get(prefix)
+            if used is None:
+                used = used_by_prefix[prefix] = {
+                    part.partname for part in package.iter_parts() if part.partname.startswith(prefix)
+                }
+            n = len(used) + 1
+            while tmpl % n in used:
+                n += 1
+            used.add(tmpl % n)
+            return PackURI(tmpl % n)
+        
+        package.next_partname = next_partname
+
+    def _add_slide(self, presentation: Presentation, slide_layout):
+        # add_slide rebuilds each layout placeholder through python-pptx per slide, but a
+        # new slide's shape tree only depends on its layout: clone it once, then copy the XML
+        skeleton = self._slide_skeletons.get(slide_layout.part)
+        if skeleton is None:
+            slide = presentation.slides.add_slide(slide_layout)
+            self._slide_skeletons[slide_layout.part] = deepcopy(slide.element.cSld.spTree)
+            return slide
+        
+        r_id, slide = presentation.part.add_slide(slide_layout)
+        # Swap the tree before slide.shapes is first read; it caches the element
+        c_sld = slide.element.cSld
+        c_sld.replace(c_sld.spTree, deepcopy(skeleton))
+        presentation.slides._sldIdLst.add_sldId(r_id)
+        return slide
+
+    def _notes_slide(self, slide):
+        # slide.notes_slide clones the notes master's placeholders for every slide; as in
+        # _add_slide, clone once per deck and copy the untouched shape tree afterwards
+        if slide.has_notes_slide:
+            return slide.notes_slide
+        if self._notes_skeleton is None:
+            notes_slide = slide.notes_slide
+            self._notes_skeleton = deepcopy(notes_slide.element.cSld.spTree)
+            return notes_slide
+        
+        slide_part = slide.part
+        package = slide_part.package
+        notes_part = NotesSlidePart._add_notes_slide_part(
+            package, slide_part, package.presentation_part.notes_master_part
+        )
+        # Swap the tree before notes_part.notes_slide is first read; it caches the element
+        c_sld = notes_part._element.cSld
+        c_sld.replace(c_sld.spTree, deepcopy(self._notes_skeleton))
+        slide_part.relate_to(notes_part, RT.NOTES_SLIDE)
+        return slide.notes_slide
 
     def _create_image_slide(self, presentation: Presentation, image_path: str, slide_number: int):
         try:
             layout_index = self._find_content_layout_for_image(presentation)
-            slide_layout = presentation.slide_layouts[layout_index]
-            slide = presentation.slides.add_slide(slide_layout)
-            slide_index = len(presentation.slides) - 1
+            slide = self._add_slide(presentation, self._layouts[layout_index])
             
-            if slide.shapes.title:
-                slide.shapes.title.text = f"Visual Insight {slide_number}"
-                self._style_title(slide.shapes.title)
+            title_shape = slide.shapes.title
+            if title_shape:
+                title_shape.text = f"Visual Insight {slide_number}"
+                self._style_title(title_shape)
             
             self._clear_content_placeholder(slide)
             self._add_image_and_text_custom_layout(slide, image_path, slide_number)
-            self._add_slide_animations(slide, slide_index)
         except Exception as e:
-            logger.error(f"Error creating image slide: {str(e)}")
+            logger.error("Error creating image slide: %s", e)
             self._create_template_based_image_slide(presentation, image_path, slide_number)
 
     def _find_content_layout_for_image(self, presentation: Presentation) -> int:
-        layouts = presentation.slide_layouts
-        for i, layout in enumerate(layouts):
-            if any(keyword in layout.name.lower() for keyword in 
-                   ['content', 'text', 'bullet', 'two content']):
-                return i
-        return 1 if len(layouts) > 1 else 0
+        # Layouts don't change while the deck is built; resolve once per presentation
+        if self._image_layout_index is None:
+            layouts = self._layouts
+            self._image_layout_index = next(
+                (i for i, layout in enumerate(layouts) if _IMAGE_LAYOUT_NAME.search(layout.name.lower())),
+                1 if len(layouts) > 1 else 0
+            )
+        return self._image_layout_index
+
+    def _find_body_placeholder(self, slide):
+        # The scan stops at the first body placeholder, usually the second shape
+        for shape in slide.placeholders:
+            if shape.placeholder_format.type == PP_PLACEHOLDER.BODY:
+                return shape
+        return None
 
     def _clear_content_placeholder(self, slide):
         try:
-            for shape in slide.placeholders:
-                if shape.placeholder_format.type == 2:
-                    if hasattr(shape, 'text_frame'):
-                        shape.text_frame.clear()
-                    break
+            shape = self._find_body_placeholder(slide)
+            if shape is not None and hasattr(shape, 'text_frame'):
+                shape.text_frame.clear()
         except Exception as e:
-            logger.warning(f"Could not clear content placeholder: {str(e)}")
+            logger.warning("Could not clear content placeholder: %s", e)
 
     def _add_image_and_text_custom_layout(self, slide, image_path: str, slide_number: int):
         try:
-            slide.shapes.add_picture(image_path, Inches(0.5), Inches(2.2), Inches(5.5), Inches(4))
-            textbox = slide.shapes.add_textbox(Inches(6.2), Inches(2.5), Inches(3.3), Inches(3.5))
+            slide.shapes.add_picture(self._image_stream(image_path), *_SIDE_IMAGE_BOX)
+            textbox = slide.shapes.add_textbox(*_SIDE_CAPTION_BOX)
             text_frame = textbox.text_frame
             text_frame.word_wrap = True
             text_frame.auto_size = None
             
-            caption_content = ["Key visual supporting our strategic analysis", "Important data visualization and insights", 
-                             "Critical business intelligence demonstration", "Contextual evidence and supporting material",
-                             "Strategic decision-making reference"]
-            
-            for i, item in enumerate(caption_content):
-                p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
-                p.text = f"• {item}"
-                p.level = 0
-                p.space_after = Pt(10)
-                self._style_enhanced_content_paragraph(p, 'content')
+            for i, item in enumerate(_IMAGE_CAPTIONS):
+                self._add_content_paragraph(text_frame, i == 0, item, 'content', _BULLET_SPACE_AFTER)
         except Exception as e:
-            logger.warning(f"Could not add image and text: {str(e)}")
+            logger.warning("Could not add image and text: %s", e)
 
     def _create_template_based_image_slide(self, presentation: Presentation, image_path: str, slide_number: int):
         try:
-            layout_index = min(1, len(presentation.slide_layouts) - 1)
-            slide = presentation.slides.add_slide(presentation.slide_layouts[layout_index])
-            if slide.shapes.title:
-                slide.shapes.title.text = f"Supporting Visual Evidence {slide_number}"
-                self._style_title(slide.shapes.title)
-            slide.shapes.add_picture(image_path, Inches(1.5), Inches(2.5), Inches(7), Inches(4))
+            layout_index = min(1, len(self._layouts) - 1)
+            slide = self._add_slide(presentation, self._layouts[layout_index])
+            title_shape = slide.shapes.title
+            if title_shape:
+                title_shape.text = f"Supporting Visual Evidence {slide_number}"
+                self._style_title(title_shape)
+            slide.shapes.add_picture(self._image_stream(image_path), *_CENTERED_IMAGE_BOX)
         except Exception as e:
-            logger.error(f"Failed to create template-based image slide: {str(e)}")
+            logger.error("Failed to create template-based image slide: %s", e)
+
+    def _image_stream(self, image_path: str) -> io.BytesIO:
+        # Read each image once per deck; a retry in the fallback slide reuses the bytes
+        blob = self._image_blobs.get(image_path)
+        if blob is None:
+            with open(image_path, 'rb') as f:
+                blob = f.read()
+            self._image_blobs[image_path] = blob
+        return io.BytesIO(blob)
 
-    def _generate_slides(self, presentation: Presentation, structure: Dict[str, Any]):
-        self._generate_slides_with_images(presentation, structure)
-    
     def _create_slide(self, presentation: Presentation, slide_data: Dict[str, Any]):
         slide_type = slide_data.get('slide_type', 'content')
-        layout_index = self.template_analyzer.get_best_layout_for_slide_type(slide_type)
+        layout_index = self._layout_indices.get(slide_type)
+        if layout_index is None:
+            layout_index = self._layout_indices[slide_type] = \
+                self.template_analyzer.get_best_layout_for_slide_type(slide_type)
         
         try:
-            slide = presentation.slides.add_slide(presentation.slide_layouts[layout_index])
-            slide_index = len(presentation.slides) - 1
+            slide = self._add_slide(presentation, self._layouts[layout_index])
             title = slide_data.get('title', 'Slide Title')
             
-            if len(title) > 60:
-                title = title[:60] + "..."
+            if len(title) > _MAX_TITLE_CHARS:
+                title = title[:_MAX_TITLE_CHARS] + "..."
                 
-            if slide.shapes.title:
-                slide.shapes.title.text = self._clean_title(title)
-                slide.shapes.title.top = Inches(0.15)
-                slide.shapes.title.height = Inches(1.8)
-                self._style_title(slide.shapes.title)
+            # shapes.title searches the placeholders on every access
+            title_shape = slide.shapes.title
+            if title_shape:
+                title_shape.text = self._clean_title(title)
+                title_shape.top = _TITLE_TOP
+                title_shape.height = _TITLE_HEIGHT
+                self._style_title(title_shape)
             else:
                 self._create_manual_title(slide, title)
             
@@ -149,112 +453,67 @@ class PresentationGenerator:
             if emphasis_points:
                 self._add_emphasis_content(slide, emphasis_points)
             
-            self._add_slide_animations(slide, slide_index)
-            
             speaking_notes = slide_data.get('speaking_notes', '')
             if speaking_notes:
                 self._add_detailed_speaker_notes(slide, speaking_notes)
             else:
                 self._add_speaker_notes(slide, title, content)
         except Exception as e:
-            logger.error(f"Error creating slide: {str(e)}")
+            logger.error("Error creating slide: %s", e)
             self._create_enhanced_basic_slide(presentation, slide_data)
 
     def _create_manual_title(self, slide, title_text: str):
+        # _create_slide has already shortened the title
         try:
-            slide_width = self.template_analyzer.get_slide_dimensions()[0]
-            if len(title_text) > 60:
-                title_text = title_text[:60] + "..."
-            
-            title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.15), slide_width - Inches(1), Inches(1.8))
+            title_box = slide.shapes.add_textbox(_TITLE_LEFT, _TITLE_TOP, self._title_width, _TITLE_HEIGHT)
             title_frame = title_box.text_frame
             title_frame.text = self._clean_title(title_text)
             title_frame.vertical_anchor = MSO_ANCHOR.MIDDLE
-            title_frame.margin_left = title_frame.margin_right = Inches(0.2)
-            title_frame.margin_top = title_frame.margin_bottom = Inches(0.15)
+            title_frame.margin_left = title_frame.margin_right = _TITLE_MARGIN_X
+            title_frame.margin_top = title_frame.margin_bottom = _TITLE_MARGIN_Y
             
             for paragraph in title_frame.paragraphs:
                 paragraph.alignment = PP_ALIGN.CENTER
-                paragraph.space_after = Pt(28)
-                paragraph.space_before = Pt(8)
-                
-                for run in paragraph.runs:
-                    fonts = self.template_analyzer.get_theme_fonts()
-                    colors = self.template_analyzer.get_theme_colors()
-                    run.font.name = fonts.get('title', 'Arial Black')
-                    run.font.size = Pt(48)
-                    run.font.bold = True
-                    run.font.underline = True
-                    self._apply_high_contrast_color(run, colors, is_title=True)
-                    
-                    if 'primary' in colors:
-                        color_hex = colors['primary'].lstrip('#')
-                        rgb = tuple(int(color_hex[i:i+2], 16) for i in (0, 2, 4))
-                        run.font.color.rgb = RGBColor(*rgb)
+                paragraph.space_after = _TITLE_SPACE_AFTER
+                paragraph.space_before = _TITLE_SPACE_BEFORE
+                self._apply_rpr(paragraph, self._manual_title_rpr)
         except Exception as e:
-            logger.warning(f"Could not create manual title: {str(e)}")
-    
-    def _create_basic_slide(self, presentation: Presentation, slide_data: Dict[str, Any]):
-        slide = presentation.slides.add_slide(presentation.slide_layouts[0])
-        if slide.shapes.title:
-            slide.shapes.title.text = self._clean_title(slide_data.get('title', 'Slide Title'))
-        
-        content = slide_data.get('content', [])
-        if content:
-            textbox = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(8), Inches(4))
-            text_frame = textbox.text_frame
-            for i, item in enumerate(content):
-                p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
-                p.text = f"• {item}"
-                p.level = 0
+            logger.warning("Could not create manual title: %s", e)
     
     def _add_enhanced_slide_content(self, slide, content: List[str], slide_type: str):
         if not content:
             return
         
-        slide_width, slide_height = self.template_analyzer.get_slide_dimensions()
-        fitted_content = self._ensure_content_fits_slide(content, slide_height)
+        fitted_content = self._ensure_content_fits_slide(content)
         
         # Clean and format content before adding to slide
         cleaned_content = self._clean_slide_content(fitted_content)
         
-        content_placeholder = None
-        for shape in slide.placeholders:
-            if shape.placeholder_format.type == 2:
-                content_placeholder = shape
-                break
+        content_placeholder = self._find_body_placeholder(slide)
         
         if content_placeholder:
-            safe_margin = Inches(0.8)
-            content_placeholder.left = safe_margin
-            content_placeholder.top = Inches(2.5)
-            content_placeholder.width = slide_width - (safe_margin * 2)
-            content_placeholder.height = slide_height - Inches(4.2)
+            content_placeholder.left = _CONTENT_LEFT
+            content_placeholder.top = _CONTENT_TOP
+            content_placeholder.width = self._content_width
+            content_placeholder.height = self._content_height
             
             text_frame = content_placeholder.text_frame
             text_frame.clear()
             text_frame.word_wrap = True
             text_frame.auto_size = None
-            text_frame.margin_top = text_frame.margin_bottom = Inches(0.3)
-            text_frame.margin_left = text_frame.margin_right = Inches(0.4)
+            text_frame.margin_top = text_frame.margin_bottom = _CONTENT_MARGIN_Y
+            text_frame.margin_left = text_frame.margin_right = _CONTENT_MARGIN_X
             
             for i, item in enumerate(cleaned_content):
-                p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
-                p.text = item
-                p.level = 0
-                p.space_after = Pt(10)
-                self._style_enhanced_content_paragraph(p, slide_type)
+                p = self._add_content_paragraph(text_frame, i == 0, item, slide_type, _BULLET_SPACE_AFTER)
                 
                 # Handle sub-points more intelligently
                 if ':' in item and len(item) > 80 and i < 4:
                     parts = item.split(':', 1)
                     if len(parts) == 2 and len(parts[1].strip()) > 10:
                         p.text = parts[0] + ':'
-                        sub_p = text_frame.add_paragraph()
-                        sub_p.text = f"• {parts[1].strip()}"
-                        sub_p.level = 1
-                        sub_p.space_after = Pt(8)
-                        self._style_enhanced_content_paragraph(sub_p, slide_type, is_sub=True)
+                        self._add_content_paragraph(text_frame, False, f"• {parts[1].strip()}", slide_type,
+                                                    _SUB_BULLET_SPACE_AFTER, level=1, is_sub=True)
         else:
             self._create_enhanced_content_textbox(slide, cleaned_content, slide_type)
 
@@ -279,16 +538,7 @@ class PresentationGenerator:
             # Ensure proper bullet formatting
             if not clean_item.startswith(('●', '•', '-')) and ':' not in clean_item:
                 # Add descriptive prefix based on content
-                if any(word in clean_item.lower() for word in ['market', 'revenue', 'growth']):
-                    clean_item = f"Market Insight: {clean_item}"
-                elif any(word in clean_item.lower() for word in ['feature', 'benefit', 'advantage']):
-                    clean_item = f"Key Benefit: {clean_item}"
-                elif any(word in clean_item.lower() for word in ['strategy', 'plan', 'approach']):
-                    clean_item = f"Strategic Approach: {clean_item}"
-                elif any(word in clean_item.lower() for word in ['result', 'outcome', 'impact']):
-                    clean_item = f"Expected Outcome: {clean_item}"
-                else:
-                    clean_item = f"Key Point: {clean_item}"
+                clean_item = self._content_category(clean_item.lower()) + clean_item
             
             # Ensure proper capitalization and punctuation
             if not clean_item.endswith(('.', '!', '?')):
@@ -298,16 +548,24 @@ class PresentationGenerator:
         
         return cleaned
     
+    def _content_category(self, lowered: str) -> str:
+        # First category with a keyword anywhere in the item wins, in table order
+        for keywords, prefix in _CONTENT_CATEGORIES:
+            for keyword in keywords:
+                if keyword in lowered:
+                    return prefix
+        return "Key Point: "
+
     def _clean_title(self, title: str) -> str:
         """Clean and format slide titles"""
         # Remove encoding artifacts
         cleaned = title.replace('_x000D_', '').replace('_x000A_', '').replace('\r', '').replace('\n', ' ')
         
         # Remove markdown headers
-        cleaned = re.sub(r'#+\s*', '', cleaned)
+        cleaned = _MARKDOWN_HEADER.sub('', cleaned)
         
         # Remove repetitive patterns
-        cleaned = re.sub(r'Analysis:\s*', '', cleaned, flags=re.IGNORECASE)
+        cleaned = _ANALYSIS_PREFIX.sub('', cleaned)
         
         # Clean extra whitespace
         cleaned = ' '.join(cleaned.split())
@@ -328,7 +586,7 @@ class PresentationGenerator:
             return
             
         try:
-            emphasis_box = slide.shapes.add_textbox(Inches(1), Inches(6), Inches(8), Inches(1))
+            emphasis_box = slide.shapes.add_textbox(*_EMPHASIS_BOX)
             text_frame = emphasis_box.text_frame
             text_frame.word_wrap = True
             
@@ -336,291 +594,159 @@ class PresentationGenerator:
                 p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
                 p.text = f"💡 {point}"
                 p.alignment = PP_ALIGN.CENTER
-                
-                for run in p.runs:
-                    run.font.size = Pt(14)
-                    run.font.bold = True
-                    colors = self.template_analyzer.get_theme_colors()
-                    bg_colors = self.template_analyzer.get_background_colors()
-                    
-                    if self._is_dark_background(bg_colors):
-                        run.font.color.rgb = RGBColor(255, 255, 255)
-                    else:
-                        run.font.color.rgb = RGBColor(180, 60, 0)
+                self._apply_rpr(p, self._emphasis_rpr)
         except Exception as e:
-            logger.warning(f"Could not add emphasis content: {str(e)}")
+            logger.warning("Could not add emphasis content: %s", e)
 
     def _create_enhanced_content_textbox(self, slide, content: List[str], slide_type: str):
-        slide_width, slide_height = self.template_analyzer.get_slide_dimensions()
-        safe_margin = Inches(0.8)
-        
-        # Clean content before adding to textbox
-        cleaned_content = self._clean_slide_content(content)
-        
-        textbox = slide.shapes.add_textbox(safe_margin, Inches(2.5), 
-                                         slide_width - (safe_margin * 2), 
-                                         slide_height - Inches(4.2))
+        # Content arrives already cleaned by the caller
+        textbox = slide.shapes.add_textbox(_CONTENT_LEFT, _CONTENT_TOP,
+                                           self._content_width, self._content_height)
         text_frame = textbox.text_frame
         text_frame.word_wrap = True
         text_frame.auto_size = None
-        text_frame.margin_top = text_frame.margin_bottom = Inches(0.3)
-        text_frame.margin_left = text_frame.margin_right = Inches(0.4)
+        text_frame.margin_top = text_frame.margin_bottom = _CONTENT_MARGIN_Y
+        text_frame.margin_left = text_frame.margin_right = _CONTENT_MARGIN_X
         
-        for i, item in enumerate(cleaned_content):
-            p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
-            
-            # Use better bullet symbols based on slide type
-            if slide_type == 'comparison':
-                bullet_symbol = "▶" if i % 2 == 0 else "◀"
-            elif slide_type == 'section':
-                bullet_symbol = "◆"
-            else:
-                bullet_symbol = "●"
-            
+        # Use better bullet symbols based on slide type
+        symbols = _BULLET_SYMBOLS.get(slide_type, _DEFAULT_BULLET_SYMBOLS)
+        for i, item in enumerate(content):
             # Only add bullet if content doesn't already have formatting
-            if not item.startswith(('●', '•', '-', '▶', '◀', '◆')):
-                p.text = f"{bullet_symbol} {item}"
-            else:
-                p.text = item
-                
-            p.level = 0
-            p.space_after = Pt(12)
-            self._style_enhanced_content_paragraph(p, slide_type)
+            if not item.startswith(_BULLET_PREFIXES):
+                item = f"{symbols[i % len(symbols)]} {item}"
+            self._add_content_paragraph(text_frame, i == 0, item, slide_type, _TEXTBOX_BULLET_SPACE_AFTER)
 
     def _create_enhanced_basic_slide(self, presentation: Presentation, slide_data: Dict[str, Any]):
         slide_type = slide_data.get('slide_type', 'content')
-        layouts = presentation.slide_layouts
+        layouts = self._layouts
         layout_index = min(1, len(layouts) - 1) if len(layouts) > 1 else 0
-        slide = presentation.slides.add_slide(layouts[layout_index])
+        slide = self._add_slide(presentation, layouts[layout_index])
         
         title = slide_data.get('title', 'Slide Title')
-        if slide.shapes.title:
-            slide.shapes.title.text = self._clean_title(title)
-            self._style_title(slide.shapes.title)
+        title_shape = slide.shapes.title
+        if title_shape:
+            title_shape.text = self._clean_title(title)
+            self._style_title(title_shape)
         
         content = slide_data.get('content', [])
         if content:
-            self._create_enhanced_content_textbox(slide, content, slide_type)
+            self._create_enhanced_content_textbox(slide, self._clean_slide_content(content), slide_type)
         
         emphasis_points = slide_data.get('emphasis_points', [])
         if emphasis_points:
             self._add_emphasis_content(slide, emphasis_points)
     
     def _style_title(self, title_shape):
-        try:
-            fonts = self.template_analyzer.get_theme_fonts()
-            colors = self.template_analyzer.get_theme_colors()
-            slide_width = self.template_analyzer.get_slide_dimensions()[0]
-            
-            title_shape.left = Inches(0.5)
-            title_shape.top = Inches(0.15)
-            title_shape.width = slide_width - Inches(1)
-            title_shape.height = Inches(1.8)
-            
-            title_shape.text_frame.margin_bottom = title_shape.text_frame.margin_top = Inches(0.15)
-            title_shape.text_frame.margin_left = title_shape.text_frame.margin_right = Inches(0.2)
-            title_shape.text_frame.vertical_anchor = MSO_ANCHOR.MIDDLE
-            
-            for paragraph in title_shape.text_frame.paragraphs:
-                paragraph.alignment = PP_ALIGN.CENTER
-                for run in paragraph.runs:
-                    run.font.name = fonts.get('title', 'Arial Black')
-                    run.font.size = Pt(48)
-                    run.font.bold = True
-                    run.font.underline = True
-                    self._apply_high_contrast_color(run, colors, is_title=True)
-                paragraph.space_after = Pt(28)
-                paragraph.space_before = Pt(8)
-        except Exception as e:
-            logger.warning(f"Error styling title: {str(e)}")
+        # Only property writes on an existing placeholder, so nothing to recover from here
+        title_shape.left = _TITLE_LEFT
+        title_shape.top = _TITLE_TOP
+        title_shape.width = self._title_width
+        title_shape.height = _TITLE_HEIGHT
+        
+        text_frame = title_shape.text_frame
+        text_frame.margin_bottom = text_frame.margin_top = _TITLE_MARGIN_Y
+        text_frame.margin_left = text_frame.margin_right = _TITLE_MARGIN_X
+        text_frame.vertical_anchor = MSO_ANCHOR.MIDDLE
+        
+        for paragraph in text_frame.paragraphs:
+            paragraph.alignment = PP_ALIGN.CENTER
+            self._apply_rpr(paragraph, self._title_rpr)
+            paragraph.space_after = _TITLE_SPACE_AFTER
+            paragraph.space_before = _TITLE_SPACE_BEFORE
     
-    def _style_enhanced_content_paragraph(self, paragraph, slide_type: str, is_sub: bool = False):
-        try:
-            fonts = self.template_analyzer.get_theme_fonts()
-            colors = self.template_analyzer.get_theme_colors()
+    def _add_content_paragraph(self, text_frame, first: bool, text: str, slide_type: str,
+                               space_after, level: int = 0, is_sub: bool = False):
+        # The frame's first paragraph already exists, and line breaks need python-pptx's
+        # run splitting; everything else is a copy of a prebuilt styled paragraph
+        if first or not text or '\n' in text or '\v' in text:
+            p = text_frame.paragraphs[0] if first else text_frame.add_paragraph()
+            p.text = text
+            p.level = level
+            p.space_after = space_after
+            self._style_enhanced_content_paragraph(p, slide_type, is_sub)
+            return p
+        
+        rPr = self._content_rpr(slide_type, is_sub)
+        key = (level, space_after, rPr)
+        template = self._paragraph_templates.get(key)
+        if template is None:
+            template = self._paragraph_templates[key] = OxmlElement('a:p')
+            paragraph = _Paragraph(template, None)
+            paragraph.text = ' '
+            paragraph.level = level
+            paragraph.space_after = space_after
             paragraph.alignment = PP_ALIGN.JUSTIFY
-            
-            for run in paragraph.runs:
-                run.font.name = fonts.get('body', 'Calibri')
-                if is_sub:
-                    run.font.size = Pt(20)
-                    run.font.italic = True
-                elif slide_type == 'title':
-                    run.font.size = Pt(28)
-                    run.font.bold = True
-                elif slide_type == 'section':
-                    run.font.size = Pt(24)
-                    run.font.bold = True
-                else:
-                    run.font.size = Pt(22)
-                self._apply_high_contrast_color(run, colors, is_title=(slide_type in ['title', 'section']))
-        except Exception as e:
-            logger.warning(f"Error styling paragraph: {str(e)}")
-
-    def _apply_high_contrast_color(self, run, colors, is_title=False):
-        try:
-            bg_colors = self.template_analyzer.get_background_colors()
-            
-            if is_title:
-                if self._is_dark_background(bg_colors):
-                    run.font.color.rgb = RGBColor(255, 255, 255)
-                else:
-                    run.font.color.rgb = RGBColor(20, 20, 20)
-            else:
-                if self._is_dark_background(bg_colors):
-                    run.font.color.rgb = RGBColor(255, 255, 255)
-                else:
-                    run.font.color.rgb = RGBColor(40, 40, 40)
-                    
-            if 'primary' in colors and self._is_color_dark_enough(colors['primary']):
-                color_hex = colors['primary'].lstrip('#')
-                rgb = tuple(int(color_hex[i:i+2], 16) for i in (0, 2, 4))
-                luminance = (0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]) / 255
-                if luminance < 0.6:
-                    run.font.color.rgb = RGBColor(*rgb)
-        except Exception as e:
-            logger.warning(f"Error applying high contrast color: {str(e)}")
-            run.font.color.rgb = RGBColor(30, 30, 30)
+            self._apply_rpr(paragraph, rPr)
+        p = deepcopy(template)
+        p.r_lst[0].text = text
+        text_frame._txBody.append(p)
+        return _Paragraph(p, text_frame)
+    
+    def _style_enhanced_content_paragraph(self, paragraph, slide_type: str, is_sub: bool = False):
+        paragraph.alignment = PP_ALIGN.JUSTIFY
+        self._apply_rpr(paragraph, self._content_rpr(slide_type, is_sub))
 
     def _is_dark_background(self, bg_colors):
-        try:
-            if not bg_colors:
-                return False
-            bg_color = bg_colors.get('primary', '#FFFFFF')
-            if bg_color.startswith('#'):
-                bg_color = bg_color[1:]
-            r, g, b = tuple(int(bg_color[i:i+2], 16) for i in (0, 2, 4))
-            luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-            return luminance < 0.5
-        except:
+        color = bg_colors.get('primary') if bg_colors else None
+        if not color:
             return False
-
-    def _is_color_dark_enough(self, color):
         try:
-            if not color:
-                return False
-            if color.startswith('#'):
-                color = color[1:]
-            r, g, b = tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
-            luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-            return luminance < 0.6
-        except:
+            return _luma(color) < _DARK_BACKGROUND_LUMA
+        except ValueError:
+            # Not a #RRGGBB color; treat it like the default white background
             return False
 
-    def _has_good_contrast(self, color1, bg_colors):
-        try:
-            if not bg_colors or not color1:
-                return False
-            bg_color = bg_colors.get('primary', '#FFFFFF')
-            if color1.startswith('#'):
-                color1 = color1[1:]
-            if bg_color.startswith('#'):
-                bg_color = bg_color[1:]
-            r1, g1, b1 = tuple(int(color1[i:i+2], 16) for i in (0, 2, 4))
-            r2, g2, b2 = tuple(int(bg_color[i:i+2], 16) for i in (0, 2, 4))
-            diff = abs(r1 - r2) + abs(g1 - g2) + abs(b1 - b2)
-            return diff > 200
-        except:
-            return False
-
-    def _add_slide_animations(self, slide, slide_index):
-        try:
-            transitions = ['fade', 'push', 'wipe', 'split', 'reveal', 'cover', 'cut']
-            transition_type = transitions[slide_index % len(transitions)]
-            self._add_text_animations(slide)
-        except Exception as e:
-            logger.warning(f"Error adding slide animations: {str(e)}")
-
-    def _add_text_animations(self, slide):
-        try:
-            for shape in slide.shapes:
-                if hasattr(shape, 'text_frame') and shape.text_frame.text.strip():
-                    self._simulate_entrance_effect(shape)
-        except Exception as e:
-            logger.warning(f"Error adding text animations: {str(e)}")
-
-    def _simulate_entrance_effect(self, shape):
-        try:
-            if hasattr(shape, 'text_frame'):
-                text_frame = shape.text_frame
-                for paragraph in text_frame.paragraphs:
-                    for run in paragraph.runs:
-                        if hasattr(run.font, 'color'):
-                            pass
-        except Exception as e:
-            logger.warning(f"Error simulating entrance effect: {str(e)}")
+    def _is_color_dark_enough(self, color):
+        # Only called with the primary color, which _load_theme has already parsed
+        return bool(color) and _luma(color) < _DARK_TEXT_LUMA
 
-    def _ensure_content_fits_slide(self, content: List[str], slide_height: float) -> List[str]:
-        try:
-            available_height = slide_height - Inches(4.5)
-            line_height = Pt(30)
-            max_lines = int(available_height / line_height)
-            max_items = min(max_lines // 2, 8)
-            fitted_content = content[:max_items]
-            
-            for i, item in enumerate(fitted_content):
-                if len(item) > 180:
-                    fitted_content[i] = item[:180] + "..."
-            return fitted_content
-        except Exception as e:
-            logger.warning(f"Error fitting content to slide: {str(e)}")
-            return content[:6]
+    def _ensure_content_fits_slide(self, content: List[str]) -> List[str]:
+        return [item if len(item) <= _MAX_BULLET_CHARS else item[:_MAX_BULLET_CHARS] + "..."
+                for item in content[:self._max_content_items]]
 
     def _add_detailed_speaker_notes(self, slide, speaking_notes: str):
         try:
-            notes_slide = slide.notes_slide
-            notes_slide.notes_text_frame.text = speaking_notes
+            self._notes_slide(slide).notes_text_frame.text = speaking_notes
         except Exception as e:
-            logger.warning(f"Error adding detailed speaker notes: {str(e)}")
-
-    def _style_content_paragraph(self, paragraph):
-        try:
-            fonts = self.template_analyzer.get_theme_fonts()
-            paragraph.alignment = PP_ALIGN.JUSTIFY
-            for run in paragraph.runs:
-                run.font.name = fonts.get('body', 'Calibri')
-                run.font.size = Pt(22)
-                bg_colors = self.template_analyzer.get_background_colors()
-                if self._is_dark_background(bg_colors):
-                    run.font.color.rgb = RGBColor(255, 255, 255)
-                else:
-                    run.font.color.rgb = RGBColor(40, 40, 40)
-        except Exception as e:
-            logger.warning(f"Error styling paragraph: {str(e)}")
-
-    def _create_content_textbox(self, slide, content: List[str]):
-        slide_width, slide_height = self.template_analyzer.get_slide_dimensions()
-        safe_margin = Inches(0.8)
-        
-        textbox = slide.shapes.add_textbox(safe_margin, Inches(2.5), 
-                                         slide_width - (safe_margin * 2), 
-                                         slide_height - Inches(4.2))
-        text_frame = textbox.text_frame
-        text_frame.word_wrap = True
-        text_frame.auto_size = None
-        text_frame.margin_left = text_frame.margin_right = Inches(0.4)
-        text_frame.margin_top = text_frame.margin_bottom = Inches(0.3)
-        
-        for i, item in enumerate(content):
-            if len(item) > 180:
-                item = item[:180] + "..."
-            p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
-            p.text = f"• {item}"
-            p.level = 0
-            p.space_after = Pt(10)
-            self._style_content_paragraph(p)
+            logger.warning("Error adding detailed speaker notes: %s", e)
 
     def _add_speaker_notes(self, slide, title: str, content: List[str]):
+        # Queued so every slide's notes come from one batched LLM call after the slides are built
+        self._pending_notes.append((slide, f"Title: {title}\nContent: {'; '.join(content)}"))
+    
+    def _fill_pending_notes(self):
+        pending, self._pending_notes = self._pending_notes, []
+        if not pending:
+            return
+        
         try:
-            slide_content = f"Title: {title}\nContent: {'; '.join(content)}"
-            speaker_notes = self.llm_service.generate_speaker_notes(slide_content)
-            notes_slide = slide.notes_slide
-            notes_slide.notes_text_frame.text = speaker_notes
+            all_notes = self.llm_service.generate_speaker_notes_batch([content for _, content in pending])
         except Exception as e:
-            logger.warning(f"Error adding speaker notes: {str(e)}")
+            logger.warning("Error adding speaker notes: %s", e)
+            return
+        
+        for (slide, _), speaker_notes in zip(pending, all_notes):
+            # An empty notes page isn't worth creating a part for
+            if not speaker_notes:
+                continue
+            try:
+                self._notes_slide(slide).notes_text_frame.text = speaker_notes
+            except Exception as e:
+                logger.warning("Error adding speaker notes: %s", e)
+    
+    def _save_presentation_bytes(self, presentation: Presentation) -> bytes:
+        # Build the zip in memory: ZipFile writes each part in many small
+        # chunks, so saving to a file directly costs a syscall per chunk
+        buffer = io.BytesIO()
+        presentation.save(buffer)
+        return buffer.getvalue()
     
     def _save_presentation(self, presentation: Presentation) -> str:
-        with tempfile.NamedTemporaryFile(suffix='.pptx', delete=False, dir=tempfile.gettempdir()) as tmp_file:
-            output_path = tmp_file.name
-        presentation.save(output_path)
+        data = memoryview(self._save_presentation_bytes(presentation))
+        fd, output_path = tempfile.mkstemp(suffix='.pptx')
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
         return output_path
@@ -3,37 +3,175 @@ Template Analyzer module for extracting styles and layouts from PowerPoint templ
 """
 from pptx import Presentation
 from pptx.dml.color import RGBColor
+from pptx.enum.shapes import PP_PLACEHOLDER
 from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE
-from pptx.util import Inches, Pt
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.util import Emu, Inches, Pt
+from collections import OrderedDict
+from functools import cached_property
+import hashlib
 import os
 import logging
+import pickle
+import re
+import threading
+import zipfile
 from typing import Dict, List, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Analysis results are reused for identical template files. Uploads land at a new
+# temporary path every time, so entries are keyed by a hash of the file contents.
+# TEMPLATE_CACHE=0 disables reuse; TEMPLATE_CACHE_DIR also pickles entries to disk
+# so worker processes share them and they survive restarts.
+TEMPLATE_CACHE_ENABLED = os.getenv('TEMPLATE_CACHE', '1') != '0'
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR')
+TEMPLATE_CACHE_SIZE = 32
+# Part of every cache key; bump it whenever the cached analysis changes shape
+TEMPLATE_CACHE_VERSION = 4
+
+# Theme used when a template gives nothing better; copied before use
+_DEFAULT_COLORS = {'primary': '#1f4e79', 'secondary': '#4472c4', 'accent': '#70ad47'}
+_DEFAULT_FONTS = {'title': 'Calibri', 'body': 'Calibri'}
+# Emu rather than Inches: Inches would re-scale its value when unpickled
+_DEFAULT_SLIDE_WIDTH = Emu(Inches(10))
+_DEFAULT_SLIDE_HEIGHT = Emu(Inches(7.5))
+
+# Layout name keywords per slide type, and the layout index used when none match:
+# the title layout (usually first) or the content layout (usually second)
+LAYOUT_KEYWORDS = {
+    'title': (('title', 'cover', 'intro'), 0),
+    'section': (('section', 'divider', 'header', 'chapter'), 0),
+    'content': (('content', 'bullet', 'text', 'list'), 1),
+    'comparison': (('two', 'comparison', 'column', 'vs'), 1),
+    'conclusion': (('conclusion', 'thank', 'end', 'summary'), 0),
+}
+# One alternation per slide type: a single search per layout name beats an
+# any() over the keywords
+_LAYOUT_PATTERNS = {
+    slide_type: (re.compile('|'.join(map(re.escape, keywords))), fallback)
+    for slide_type, (keywords, fallback) in LAYOUT_KEYWORDS.items()
+}
+
+# Master placeholder type that layout placeholders inherit missing geometry from,
+# as in python-pptx's LayoutPlaceholder; other types inherit from their own type
+_BASE_PLACEHOLDER_TYPE = {
+    PP_PLACEHOLDER.CHART: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.BITMAP: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.CENTER_TITLE: PP_PLACEHOLDER.TITLE,
+    PP_PLACEHOLDER.ORG_CHART: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.MEDIA_CLIP: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.OBJECT: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.PICTURE: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.SUBTITLE: PP_PLACEHOLDER.BODY,
+    PP_PLACEHOLDER.TABLE: PP_PLACEHOLDER.BODY,
+}
+_NO_GEOMETRY = (None, None, None, None)
+
+# Pickled (theme_info, layout_info, background_colors) by content hash;
+# each hit unpickles a fresh copy so analyzers never share mutable state
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+def _template_cache_key(template_path: str) -> str:
+    """Hash the template file's contents and the cache format version."""
+    digest = hashlib.sha256(str(TEMPLATE_CACHE_VERSION).encode())
+    with open(template_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _load_cached_analysis(key: str) -> Optional[tuple]:
+    """Return a cached analysis from memory or disk, or None."""
+    with _analysis_cache_lock:
+        data = _analysis_cache.get(key)
+        if data is not None:
+            _analysis_cache.move_to_end(key)
+    
+    if data is None and TEMPLATE_CACHE_DIR:
+        try:
+            with open(os.path.join(TEMPLATE_CACHE_DIR, f"{key}.pkl"), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read cached template analysis: %s", e)
+            return None
+        _remember_analysis(key, data)
+    
+    return pickle.loads(data) if data is not None else None
+
+def _store_cached_analysis(key: str, analysis: tuple):
+    """Cache an analysis in memory and, when configured, on disk."""
+    data = pickle.dumps(analysis, protocol=pickle.HIGHEST_PROTOCOL)
+    _remember_analysis(key, data)
+    if TEMPLATE_CACHE_DIR:
+        path = os.path.join(TEMPLATE_CACHE_DIR, f"{key}.pkl")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cached template analysis: %s", e)
+
+def _remember_analysis(key: str, data: bytes):
+    """Insert into the in-memory LRU, evicting the oldest entry when full."""
+    with _analysis_cache_lock:
+        _analysis_cache[key] = data
+        _analysis_cache.move_to_end(key)
+        if len(_analysis_cache) > TEMPLATE_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+
 class TemplateAnalyzer:
     """Analyzer for PowerPoint template files to extract styling and layout information."""
     
     def __init__(self, template_path: str):
         self.template_path = template_path
-        self.presentation = None
         self.theme_info = {}
         self.layout_info = {}
-        self.images = []
+        self._background_colors = {}
         self._load_template()
     
     def _load_template(self):
-        """Load the PowerPoint template and analyze its structure."""
+        """Load the PowerPoint template and analyze its structure.
+        
+        A template analyzed before is restored from the cache without parsing
+        it. Images are only looked up when first asked for.
+        """
         try:
-            self.presentation = Presentation(self.template_path)
+            key = _template_cache_key(self.template_path) if TEMPLATE_CACHE_ENABLED else None
+            cached = _load_cached_analysis(key) if key else None
+            if cached is not None:
+                self.theme_info, self.layout_info, self._background_colors = cached
+                logger.info("Loaded cached analysis for template: %s", self.template_path)
+                return
+            
+            # Parse first so an unreadable template raises here rather than
+            # falling back to the default theme in _analyze_theme
+            self.presentation
             self._analyze_theme()
             self._analyze_layouts()
-            self._extract_images()
-            logger.info(f"Successfully loaded template: {self.template_path}")
+            # Resolved eagerly so a cached analysis doesn't need the presentation
+            self._background_colors = self._analyze_background_colors()
+            if key:
+                _store_cached_analysis(key, (self.theme_info, self.layout_info, self._background_colors))
+            logger.info("Successfully loaded template: %s", self.template_path)
         except Exception as e:
-            logger.error(f"Error loading template: {str(e)}")
+            logger.error("Error loading template: %s", e)
             raise
     
+    @cached_property
+    def presentation(self):
+        """The parsed template, loaded on first use."""
+        return Presentation(self.template_path)
+    
+    @cached_property
+    def images(self) -> List[Dict]:
+        """Position and media part of each template image, found on first use."""
+        return self._extract_images()
+    
     def _analyze_theme(self):
         """Extract theme information from the template."""
         try:
@@ -50,13 +188,22 @@ class TemplateAnalyzer:
             self.theme_info['slide_height'] = self.presentation.slide_height
             
         except Exception as e:
-            logger.warning(f"Error analyzing theme: {str(e)}")
+            logger.warning("Error analyzing theme: %s", e)
             self._set_default_theme()
     
     def _analyze_layouts(self):
-        """Analyze slide layouts available in the template."""
+        """Analyze slide layouts available in the template.
+        
+        Placeholder geometry is read from the layout XML directly. Values a layout
+        leaves out come from the matching master placeholder, looked up once per
+        master rather than once per attribute as python-pptx's proxies do.
+        Layouts repeat the same placeholders, so identical entries are shared
+        (and pickled once in the analysis cache); treat them as read-only.
+        """
         try:
             layouts = []
+            master_geometry = {}
+            seen_placeholders = {}
             for i, layout in enumerate(self.presentation.slide_layouts):
                 layout_info = {
                     'index': i,
@@ -64,79 +211,132 @@ class TemplateAnalyzer:
                     'placeholders': []
                 }
                 
+                master_part = layout.part.slide_master.part
+                inherited = master_geometry.get(master_part)
+                if inherited is None:
+                    inherited = master_geometry[master_part] = \
+                        self._master_placeholder_geometry(master_part.slide_master)
+                
                 # Analyze placeholders in this layout
-                for placeholder in layout.placeholders:
-                    placeholder_info = {
-                        'idx': placeholder.placeholder_format.idx,
-                        'type': placeholder.placeholder_format.type,
-                        'left': placeholder.left,
-                        'top': placeholder.top,
-                        'width': placeholder.width,
-                        'height': placeholder.height
-                    }
+                for sp in layout._element.cSld.spTree.iter_ph_elms():
+                    ph_type = sp.ph_type
+                    geometry = (sp.x, sp.y, sp.cx, sp.cy)
+                    if None in geometry:
+                        base = inherited.get(_BASE_PLACEHOLDER_TYPE.get(ph_type, ph_type), _NO_GEOMETRY)
+                        geometry = tuple(base_value if value is None else value
+                                         for value, base_value in zip(geometry, base))
+                    # Plain int type so the analysis can be pickled; it still
+                    # compares equal to the PP_PLACEHOLDER member
+                    key = (sp.ph_idx, int(ph_type)) + geometry
+                    placeholder_info = seen_placeholders.get(key)
+                    if placeholder_info is None:
+                        idx, type_, left, top, width, height = key
+                        placeholder_info = seen_placeholders[key] = {
+                            'idx': idx,
+                            'type': type_,
+                            'left': left,
+                            'top': top,
+                            'width': width,
+                            'height': height
+                        }
                     layout_info['placeholders'].append(placeholder_info)
                 
                 layouts.append(layout_info)
             
             self.layout_info['layouts'] = layouts
+            self.layout_info['best_by_slide_type'] = self._match_layouts_to_slide_types(layouts)
             
         except Exception as e:
-            logger.warning(f"Error analyzing layouts: {str(e)}")
+            logger.warning("Error analyzing layouts: %s", e)
             self.layout_info['layouts'] = []
     
-    def _extract_images(self):
-        """Extract images from the template for reuse."""
+    def _master_placeholder_geometry(self, slide_master) -> Dict[Any, tuple]:
+        """Map each placeholder type on a slide master to its (left, top, width, height)."""
+        geometry = {}
+        for sp in slide_master._element.cSld.spTree.iter_ph_elms():
+            # Like SlideMaster.placeholders.get, the first placeholder of a type wins
+            geometry.setdefault(sp.ph_type, (sp.x, sp.y, sp.cx, sp.cy))
+        return geometry
+    
+    def _match_layouts_to_slide_types(self, layouts: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Pick the layout index for every slide type once, so lookups are a dict get."""
+        names = [(layout['index'], layout['name'].lower()) for layout in layouts]
+        best = {}
+        for slide_type, (pattern, fallback) in _LAYOUT_PATTERNS.items():
+            best[slide_type] = next(
+                (index for index, name in names if pattern.search(name)),
+                min(fallback, len(layouts) - 1)
+            )
+        return best
+    
+    def _extract_images(self) -> List[Dict]:
+        """Record where the template's images sit and which media part holds each.
+        
+        The image bytes stay in the package (and out of the analysis cache);
+        get_template_images(load_data=True) reads them on demand.
+        """
+        images = []
         try:
             for slide in self.presentation.slides:
+                # A picture needs an image relationship on its slide; most
+                # template slides have none, so skip their shape walk
+                if not any(rel.reltype == RT.IMAGE for rel in slide.part.rels.values()):
+                    continue
                 for shape in slide.shapes:
                     if hasattr(shape, 'image'):
+                        image_part = slide.part.related_part(shape._element.blip_rId)
                         image_info = {
                             'left': shape.left,
                             'top': shape.top,
                             'width': shape.width,
                             'height': shape.height,
-                            'image_data': shape.image.blob
+                            'partname': str(image_part.partname),
+                            'sha1': image_part.sha1
                         }
-                        self.images.append(image_info)
+                        images.append(image_info)
         
         except Exception as e:
-            logger.warning(f"Error extracting images: {str(e)}")
+            logger.warning("Error extracting images: %s", e)
+        
+        return images
     
     def _extract_colors(self, slide) -> Dict[str, str]:
         """Extract color scheme from a slide."""
-        colors = {}
+        colors = dict(_DEFAULT_COLORS)
         try:
             for shape in slide.shapes:
-                if hasattr(shape, 'fill') and shape.fill.type == 1:  # Solid fill
-                    if hasattr(shape.fill, 'fore_color') and hasattr(shape.fill.fore_color, 'rgb'):
-                        rgb = shape.fill.fore_color.rgb
-                        colors['primary'] = f"#{rgb.red:02x}{rgb.green:02x}{rgb.blue:02x}"
-                        break
+                # Each property access walks the XML, so read each one once
+                # rather than probing it with hasattr first
+                try:
+                    fill = shape.fill
+                    if fill.type != 1:  # Solid fill
+                        continue
+                    rgb = fill.fore_color.rgb
+                except AttributeError:
+                    continue
+                colors['primary'] = f"#{rgb.red:02x}{rgb.green:02x}{rgb.blue:02x}"
+                break
         except Exception:
             pass
         
-        # Set defaults if no colors found
-        if 'primary' not in colors:
-            colors['primary'] = '#1f4e79'
-        colors['secondary'] = '#4472c4'
-        colors['accent'] = '#70ad47'
-        
         return colors
     
     def _extract_fonts(self, slide) -> Dict[str, str]:
         """Extract font information from a slide."""
-        fonts = {'title': 'Calibri', 'body': 'Calibri'}
+        fonts = dict(_DEFAULT_FONTS)
         
         try:
-            for shape in slide.shapes:
-                if hasattr(shape, 'text_frame'):
-                    for paragraph in shape.text_frame.paragraphs:
-                        for run in paragraph.runs:
-                            if run.font.name:
-                                if 'title' not in fonts:
-                                    fonts['title'] = run.font.name
-                                fonts['body'] = run.font.name
-                                break
+            # The body font is the first named run of the last paragraph that
+            # has one, so search from the end and stop at the first hit
+            for shape in reversed(list(slide.shapes)):
+                text_frame = getattr(shape, 'text_frame', None)
+                if text_frame is None:
+                    continue
+                for paragraph in reversed(text_frame.paragraphs):
+                    for run in paragraph.runs:
+                        if run.font.name:
+                            fonts['body'] = run.font.name
+                            return fonts
         except Exception:
             pass
         
@@ -145,17 +345,10 @@ class TemplateAnalyzer:
     def _set_default_theme(self):
         """Set default theme information."""
         self.theme_info = {
-            'colors': {
-                'primary': '#1f4e79',
-                'secondary': '#4472c4',
-                'accent': '#70ad47'
-            },
-            'fonts': {
-                'title': 'Calibri',
-                'body': 'Calibri'
-            },
-            'slide_width': Inches(10),
-            'slide_height': Inches(7.5)
+            'colors': dict(_DEFAULT_COLORS),
+            'fonts': dict(_DEFAULT_FONTS),
+            'slide_width': _DEFAULT_SLIDE_WIDTH,
+            'slide_height': _DEFAULT_SLIDE_HEIGHT
         }
     
     def get_best_layout_for_slide_type(self, slide_type: str) -> int:
@@ -173,50 +366,9 @@ class TemplateAnalyzer:
         if not layouts:
             return 0  # Default to first layout
         
-        # Enhanced layout selection logic
-        if slide_type == 'title':
-            # Look for title slide layout (usually first)
-            for layout in layouts:
-                name_lower = layout['name'].lower()
-                if any(keyword in name_lower for keyword in ['title', 'cover', 'intro']):
-                    return layout['index']
-            return 0
-        
-        elif slide_type == 'section':
-            # Look for section header layouts
-            for layout in layouts:
-                name_lower = layout['name'].lower()
-                if any(keyword in name_lower for keyword in ['section', 'divider', 'header', 'chapter']):
-                    return layout['index']
-            # Fallback to title-like layout
-            return 0
-        
-        elif slide_type == 'content':
-            # Look for content layouts with bullet points
-            for layout in layouts:
-                name_lower = layout['name'].lower()
-                if any(keyword in name_lower for keyword in ['content', 'bullet', 'text', 'list']):
-                    return layout['index']
-            # Use layout 1 if available (usually content layout)
-            return min(1, len(layouts) - 1)
-        
-        elif slide_type == 'comparison':
-            # Look for two-column or comparison layouts
-            for layout in layouts:
-                name_lower = layout['name'].lower()
-                if any(keyword in name_lower for keyword in ['two', 'comparison', 'column', 'vs']):
-                    return layout['index']
-            # Fallback to content layout
-            return min(1, len(layouts) - 1)
-        
-        elif slide_type == 'conclusion':
-            # Look for conclusion or thank you layouts
-            for layout in layouts:
-                name_lower = layout['name'].lower()
-                if any(keyword in name_lower for keyword in ['conclusion', 'thank', 'end', 'summary']):
-                    return layout['index']
-            # Use title layout for conclusion
-            return 0
+        best = self.layout_info.get('best_by_slide_type', {}).get(slide_type)
+        if best is not None:
+            return best
         
         # Default fallback
         return min(1, len(layouts) - 1)
@@ -227,47 +379,31 @@ class TemplateAnalyzer:
     
     def get_background_colors(self) -> Dict[str, str]:
         """Get background colors from the template for contrast calculation."""
+        return self._background_colors
+    
+    def _analyze_background_colors(self) -> Dict[str, str]:
+        """Read the background color of the first slide, or of its slide master."""
         try:
             bg_colors = {}
             
             # Analyze first slide's background
             if self.presentation.slides:
                 slide = self.presentation.slides[0]
+                slide_fill = self._own_background_fill(slide)
                 
-                # Try to get background fill
-                if hasattr(slide, 'background') and slide.background.fill:
-                    fill = slide.background.fill
-                    if hasattr(fill, 'fore_color') and fill.fore_color:
-                        if hasattr(fill.fore_color, 'rgb'):
-                            rgb = fill.fore_color.rgb
-                            # Fix: Access RGB values correctly
-                            try:
-                                if hasattr(rgb, '__iter__') and len(rgb) >= 3:
-                                    # RGB is a tuple or list
-                                    bg_colors['primary'] = f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
-                                else:
-                                    # RGB is an RGBColor object
-                                    bg_colors['primary'] = f"#{rgb:06x}"
-                            except:
-                                bg_colors['primary'] = '#FFFFFF'
-                
-                # Fallback: analyze slide master background
-                if not bg_colors and hasattr(slide, 'slide_layout'):
-                    layout = slide.slide_layout
-                    if hasattr(layout, 'slide_master'):
-                        master = layout.slide_master
-                        if hasattr(master, 'background') and master.background.fill:
-                            fill = master.background.fill
-                            if hasattr(fill, 'fore_color') and fill.fore_color:
-                                if hasattr(fill.fore_color, 'rgb'):
-                                    rgb = fill.fore_color.rgb
-                                    try:
-                                        if hasattr(rgb, '__iter__') and len(rgb) >= 3:
-                                            bg_colors['primary'] = f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
-                                        else:
-                                            bg_colors['primary'] = f"#{rgb:06x}"
-                                    except:
-                                        bg_colors['primary'] = '#FFFFFF'
+                # Most templates leave the slide background to the master; such
+                # slides keep the white default without a walk through the proxies
+                if slide_fill is not None:
+                    primary = self._background_fill_hex(slide_fill)
+                    
+                    # Fallback: analyze slide master background
+                    if primary is None:
+                        master_fill = self._own_background_fill(slide.slide_layout.slide_master)
+                        if master_fill is not None:
+                            primary = self._background_fill_hex(master_fill)
+                    
+                    if primary is not None:
+                        bg_colors['primary'] = primary
             
             # Default to white if no background found
             if not bg_colors:
@@ -276,20 +412,59 @@ class TemplateAnalyzer:
             return bg_colors
             
         except Exception as e:
-            logger.warning(f"Error getting background colors: {str(e)}")
+            logger.warning("Error getting background colors: %s", e)
             return {'primary': '#FFFFFF'}  # Default to white
     
+    def _own_background_fill(self, slide):
+        """Return the fill of a slide's or master's own background, or None if it has none."""
+        # Checked on the XML first: python-pptx's background.fill would replace
+        # a missing or theme-referenced background with an empty fill
+        bg = slide._element.cSld.bg
+        if bg is None or bg.bgPr is None:
+            return None
+        return slide.background.fill
+    
+    def _background_fill_hex(self, fill) -> Optional[str]:
+        """Return a background fill's color as hex, or None when it has no RGB color."""
+        # fore_color raises TypeError on fills without one; that is left to the caller
+        try:
+            rgb = fill.fore_color.rgb
+        except AttributeError:
+            return None
+        try:
+            return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
+        except Exception:
+            return '#FFFFFF'
+    
     def get_theme_fonts(self) -> Dict[str, str]:
         """Get theme fonts."""
         return self.theme_info.get('fonts', {})
     
-    def get_template_images(self) -> List[Dict]:
-        """Get extracted images from template."""
-        return self.images
+    def get_template_images(self, load_data: bool = False) -> List[Dict]:
+        """
+        Get extracted images from template.
+        
+        Args:
+            load_data: Also read each image's bytes into 'image_data'; a media
+                part shared by several shapes is read once
+            
+        Returns:
+            Position, media part name and SHA-1 of each image
+        """
+        if not load_data:
+            return self.images
+        
+        blobs = {}
+        with zipfile.ZipFile(self.template_path) as package:
+            for image in self.images:
+                partname = image['partname']
+                if partname not in blobs:
+                    blobs[partname] = package.read(partname.lstrip('/'))
+        return [dict(image, image_data=blobs[image['partname']]) for image in self.images]
     
     def get_slide_dimensions(self) -> tuple:
         """Get slide dimensions."""
         return (
-            self.theme_info.get('slide_width', Inches(10)),
-            self.theme_info.get('slide_height', Inches(7.5))
+            self.theme_info.get('slide_width', _DEFAULT_SLIDE_WIDTH),
+            self.theme_info.get('slide_height', _DEFAULT_SLIDE_HEIGHT)
         )